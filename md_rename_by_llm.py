@@ -14,11 +14,9 @@ The script will:
 """
 
 import sys
-import os
+import functools
 from pathlib import Path
 from datetime import datetime
-from openai import OpenAI
-import httpx
 import re
 
 # ---------------- CONFIG ----------------
@@ -44,35 +42,38 @@ def read_md_text(md_path: Path, max_chars: int = MAX_CHARS) -> str:
         sys.exit(1)
 
 
+# Date patterns scanned by extract_date_from_filename, compiled once at
+# import. yyyy-mm-dd and yyyy/mm/dd share one alternation so the
+# filename is only scanned once for both separator styles.
+_DATE_COMPACT_RE = re.compile(r'(\d{4})(\d{2})(\d{2})')
+_DATE_PATTERNS = [
+    (re.compile(r'(\d{4})[-/](\d{2})[-/](\d{2})'),
+     lambda m: f"{m.group(1)}{m.group(2)}{m.group(3)}"),  # yyyy-mm-dd or yyyy/mm/dd
+    (re.compile(r'(\d{2})(\d{2})(\d{4})'),
+     lambda m: f"{m.group(3)}{m.group(1)}{m.group(2)}"),  # mmddyyyy
+]
+
+
 def extract_date_from_filename(filename: str) -> str:
     """Try to extract date from filename, return yyyymmdd format."""
     # Try to find all 8-digit sequences and validate them as dates
     # This avoids matching phone numbers by validating the date
-    
+
     # Find all potential 8-digit date patterns
-    all_matches = re.finditer(r'(\d{4})(\d{2})(\d{2})', filename)
-    
+    all_matches = _DATE_COMPACT_RE.finditer(filename)
+
     for match in all_matches:
         year = int(match.group(1))
         month = int(match.group(2))
         day = int(match.group(3))
-        
-        # Validate it's a reasonable date (prioritize recent dates)
-        if 2000 <= year <= 2100 and 1 <= month <= 12 and 1 <= day <= 31:
-            return f"{match.group(1)}{match.group(2)}{match.group(3)}"
-        # Also accept dates from 1990-1999
-        elif 1990 <= year <= 1999 and 1 <= month <= 12 and 1 <= day <= 31:
+
+        # Validate it's a reasonable date (anything from 1990 on)
+        if 1990 <= year <= 2100 and 1 <= month <= 12 and 1 <= day <= 31:
             return f"{match.group(1)}{match.group(2)}{match.group(3)}"
-    
+
     # Try patterns with separators
-    patterns = [
-        (r'(\d{4})-(\d{2})-(\d{2})', lambda m: f"{m.group(1)}{m.group(2)}{m.group(3)}"),  # yyyy-mm-dd
-        (r'(\d{4})/(\d{2})/(\d{2})', lambda m: f"{m.group(1)}{m.group(2)}{m.group(3)}"),  # yyyy/mm/dd
-        (r'(\d{2})(\d{2})(\d{4})', lambda m: f"{m.group(3)}{m.group(1)}{m.group(2)}"),  # mmddyyyy
-    ]
-    
-    for pattern, formatter in patterns:
-        match = re.search(pattern, filename)
+    for pattern, formatter in _DATE_PATTERNS:
+        match = pattern.search(filename)
         if match:
             try:
                 date_str = formatter(match)
@@ -84,7 +85,7 @@ def extract_date_from_filename(filename: str) -> str:
                         return date_str
             except:
                 continue
-    
+
     # If no date found, return None
     return None
 
@@ -109,84 +110,49 @@ def get_file_date(md_path: Path) -> str:
     return datetime.fromtimestamp(creation_time).strftime("%Y%m%d")
 
 
-def check_api_available() -> bool:
-    """Check if LM Studio API is available."""
+# One client per process: the pooled connection is reused across calls
+# instead of redoing TCP setup each time, and trust_env=False makes
+# httpx ignore HTTP(S)_PROXY etc. entirely, so the localhost LM Studio
+# connection needs no env-var juggling at all.
+# httpx and openai are imported lazily in here: together they cost a
+# few hundred ms of cold start, which an interactive CLI pays before
+# argv validation even runs if they sit at module top.
+@functools.lru_cache(maxsize=1)
+def _get_http_client():
+    import httpx
+    return httpx.Client(timeout=30.0, trust_env=False)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_client():
+    from openai import OpenAI
+    return OpenAI(
+        base_url=LM_STUDIO_BASE_URL,
+        api_key="lm-studio",  # dummy key
+        http_client=_get_http_client(),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _api_alive(base_url: str) -> bool:
     try:
-        # Save original proxy env vars
-        original_http_proxy = os.environ.pop('HTTP_PROXY', None)
-        original_https_proxy = os.environ.pop('HTTPS_PROXY', None)
-        original_all_proxy = os.environ.pop('ALL_PROXY', None)
-        original_no_proxy = os.environ.get('NO_PROXY', '')
-        
-        # Set NO_PROXY to bypass proxy for localhost
-        os.environ['NO_PROXY'] = '127.0.0.1,localhost'
-        # Also clear proxy env vars for httpx
-        os.environ.pop('HTTP_PROXY', None)
-        os.environ.pop('HTTPS_PROXY', None)
-        os.environ.pop('http_proxy', None)
-        os.environ.pop('https_proxy', None)
-        
-        http_client = httpx.Client(timeout=5.0)
-        
-        # Try to connect to the models endpoint
-        response = http_client.get(f"{LM_STUDIO_BASE_URL}/models")
-        http_client.close()
-        
-        # Restore proxy env vars
-        if original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if original_no_proxy:
-            os.environ['NO_PROXY'] = original_no_proxy
-        else:
-            os.environ.pop('NO_PROXY', None)
-        
-        return response.status_code == 200
+        # trust_env=False on the shared client already bypasses any
+        # proxy env vars for the localhost connection
+        return _get_http_client().get(f"{base_url}/models", timeout=5.0).status_code == 200
     except Exception:
-        # Restore proxy env vars
-        if 'original_http_proxy' in locals() and original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if 'original_https_proxy' in locals() and original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if 'original_all_proxy' in locals() and original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if 'original_no_proxy' in locals():
-            if original_no_proxy:
-                os.environ['NO_PROXY'] = original_no_proxy
-            else:
-                os.environ.pop('NO_PROXY', None)
         return False
 
 
+def check_api_available() -> bool:
+    """Check if LM Studio API is available (probed once per process)."""
+    return _api_alive(LM_STUDIO_BASE_URL)
+
+
 def suggest_filenames(text: str, date_str: str) -> list[str]:
     """Use LLM to suggest 5 filename options."""
-    try:
-        # Save original proxy env vars
-        original_http_proxy = os.environ.pop('HTTP_PROXY', None)
-        original_https_proxy = os.environ.pop('HTTPS_PROXY', None)
-        original_all_proxy = os.environ.pop('ALL_PROXY', None)
-        original_no_proxy = os.environ.get('NO_PROXY', '')
-        
-        # Set NO_PROXY to bypass proxy for localhost
-        os.environ['NO_PROXY'] = '127.0.0.1,localhost'
-        # Also clear proxy env vars for httpx
-        os.environ.pop('HTTP_PROXY', None)
-        os.environ.pop('HTTPS_PROXY', None)
-        os.environ.pop('http_proxy', None)
-        os.environ.pop('https_proxy', None)
-        
-        http_client = httpx.Client(timeout=30.0)
-        
-        client = OpenAI(
-            base_url=LM_STUDIO_BASE_URL,
-            api_key="lm-studio",  # dummy key
-            http_client=http_client
-        )
+    client = _get_client()
 
-        prompt = f"""Based on the following document excerpt, suggest 5 different filename options in the format: {date_str}-<topic>
+    prompt = f"""Based on the following document excerpt, suggest 5 different filename options in the format: {date_str}-<topic>
 
 Requirements:
 - Each filename should be in format: {date_str}-<topic>
@@ -207,79 +173,50 @@ Return format (example):
 {date_str}-contractual-document-review
 """
 
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that suggests concise, descriptive filenames."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=TEMPERATURE,
-            timeout=30.0
-        )
-
-        result = response.choices[0].message.content.strip()
-        http_client.close()
-        
-        # Restore proxy env vars
-        if original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if original_no_proxy:
-            os.environ['NO_PROXY'] = original_no_proxy
-        else:
-            os.environ.pop('NO_PROXY', None)
-        
-        # Parse the suggestions
-        suggestions = []
-        for line in result.split('\n'):
-            line = line.strip()
-            if line and not line.startswith('#') and not line.startswith('//'):
-                # Extract filename if LLM added extra text
-                if date_str in line:
-                    # Extract the part after date
-                    parts = line.split(date_str + '-', 1)
-                    if len(parts) > 1:
-                        topic = parts[1].split()[0]  # Take first word/topic
-                        suggestions.append(f"{date_str}-{topic}")
-                    else:
-                        suggestions.append(line)
-                elif line.startswith(date_str):
+    response = client.chat.completions.create(
+        model=MODEL_NAME,
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant that suggests concise, descriptive filenames."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=TEMPERATURE,
+        timeout=30.0
+    )
+
+    result = response.choices[0].message.content.strip()
+
+    # Parse the suggestions
+    suggestions = []
+    for line in result.split('\n'):
+        line = line.strip()
+        if line and not line.startswith('#') and not line.startswith('//'):
+            # Extract filename if LLM added extra text
+            if date_str in line:
+                # Extract the part after date
+                parts = line.split(date_str + '-', 1)
+                if len(parts) > 1:
+                    topic = parts[1].split()[0]  # Take first word/topic
+                    suggestions.append(f"{date_str}-{topic}")
+                else:
                     suggestions.append(line)
-        
-        # Ensure we have exactly 5 suggestions
-        while len(suggestions) < 5:
-            suggestions.append(f"{date_str}-topic-{len(suggestions) + 1}")
-        
-        return suggestions[:5]
-        
-    except Exception as e:
-        if 'http_client' in locals():
-            http_client.close()
-        # Restore proxy env vars
-        if 'original_http_proxy' in locals() and original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if 'original_https_proxy' in locals() and original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if 'original_all_proxy' in locals() and original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if 'original_no_proxy' in locals():
-            if original_no_proxy:
-                os.environ['NO_PROXY'] = original_no_proxy
-            else:
-                os.environ.pop('NO_PROXY', None)
-        raise
+            elif line.startswith(date_str):
+                suggestions.append(line)
+
+    # Ensure we have exactly 5 suggestions
+    while len(suggestions) < 5:
+        suggestions.append(f"{date_str}-topic-{len(suggestions) + 1}")
+
+    return suggestions[:5]
+
+
+# Filesystem-unsafe characters and whitespace all map to '-', in one
+# C-level table pass instead of two regex scans
+_SANITIZE = str.maketrans({c: '-' for c in '<>:"/\\|?* \t\n\r'})
 
 
 def sanitize_filename(name: str) -> str:
     """Sanitize filename to be filesystem-safe."""
-    # Remove or replace invalid characters
-    name = re.sub(r'[<>:"/\\|?*]', '-', name)
-    name = re.sub(r'\s+', '-', name)  # Replace spaces with hyphens
-    name = name.strip('.-')  # Remove leading/trailing dots and hyphens
-    return name
+    return name.translate(_SANITIZE).strip('.-')
 
 
 def interactive_rename(md_path: Path, suggestions: list[str]) -> str:
@@ -294,7 +231,11 @@ def interactive_rename(md_path: Path, suggestions: list[str]) -> str:
     print(f"\n  0. Enter custom filename")
     print(f"  q. Quit without renaming")
     print("="*60)
-    
+
+    # Computed once, not on every invalid retry; also guards against
+    # an LLM suggestion that came back without the date prefix
+    date_prefix = suggestions[0].split('-', 1)[0] if suggestions else datetime.now().strftime('%Y%m%d')
+
     while True:
         choice = input("\nSelect an option (1-5, 0, or q): ").strip().lower()
         
@@ -306,8 +247,7 @@ def interactive_rename(md_path: Path, suggestions: list[str]) -> str:
             custom_name = input(f"Enter custom filename (without .md extension): ").strip()
             if custom_name:
                 # Ensure it starts with date
-                if not custom_name.startswith(suggestions[0].split('-')[0]):
-                    date_prefix = suggestions[0].split('-')[0]
+                if not custom_name.startswith(date_prefix):
                     custom_name = f"{date_prefix}-{custom_name}"
                 custom_name = sanitize_filename(custom_name)
                 return f"{custom_name}.md"
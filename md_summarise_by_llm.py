@@ -8,10 +8,13 @@ Output:
 """
 
 import sys
-import os
-import atexit
+import re
+import asyncio
+import hashlib
+import json
+import random
 from pathlib import Path
-from openai import OpenAI
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError, RateLimitError
 import httpx
 
 # ---------------- CONFIG ----------------
@@ -19,503 +22,296 @@ MODEL_NAME = "openai/gpt-oss-20b"
 LM_STUDIO_BASE_URL = "http://127.0.0.1:1234/v1"
 TEMPERATURE = 0.3
 MAX_CHARS_SAFE = 8000   # Safe character limit to avoid hitting token limits
-TEMP_FILE_PREFIX = "._temp_"  # Prefix for temporary files
-MAX_DEPTH = 3  # Maximum recursion depth (default: 3 levels)
+MAX_REDUCE_ROUNDS = 3  # Maximum reduce passes over the combined summaries
+CACHE_DIR = Path.home() / ".cache" / "md_summarise"  # Per-chunk summary cache
 # ---------------------------------------
 
-# Global list to track temporary files for cleanup
-_temp_files = []
-
+# One shared async client pair: connection pooling lets concurrent
+# summarize calls reuse sockets instead of redoing TCP setup per call.
+# trust_env=False makes httpx ignore HTTP(S)_PROXY etc. entirely, so the
+# localhost LM Studio connection needs no env-var juggling at all.
+# http2=True multiplexes the concurrent chunk summaries over one kept-alive
+# connection instead of opening a socket (TCP handshake included) per call
+_http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=30.0,
+    trust_env=False,
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+)
+_client = AsyncOpenAI(
+    base_url=LM_STUDIO_BASE_URL,
+    api_key="lm-studio",  # dummy key
+    http_client=_http_client,
+)
 
 # Custom exceptions
+DEFAULT_TAGS = ["general", "summary", "document", "content", "notes"]
+
+# Frontmatter handling for format_summary_with_tags, compiled once at import
+_FRONTMATTER_RE = re.compile(r'\A---\n(.*?)\n---\n', re.DOTALL)
+_TAG_LINE_RE = re.compile(r'^tag:.*$', re.MULTILINE)
+
+# Appended to the final summarize/combine prompt so tags come back in the
+# same response instead of a second full round trip over the summary
+_TAG_ADDENDUM = """
+Additionally, generate exactly 5 relevant tags describing the main topics
+(concise, lowercase, 1-3 words each; no generic words like "summary" or
+"document").
+
+Return a JSON object with exactly these keys:
+{"tags": ["tag1", "tag2", "tag3", "tag4", "tag5"], "summary": "<the Markdown document>"}
+"""
+
+
+def _parse_tagged_response(content: str) -> tuple[str, list[str]]:
+    """Parse the fused summary+tags JSON; fall back to defaults on failure."""
+    try:
+        payload = json.loads(content)
+        summary = payload["summary"].strip()
+        tags = [str(tag).strip() for tag in payload["tags"] if str(tag).strip()]
+    except (json.JSONDecodeError, KeyError, TypeError):
+        print("⚠️  Warning: Could not parse tags from response, using defaults")
+        return content, list(DEFAULT_TAGS)
+
+    # Ensure we have exactly 5 tags (pad or trim if needed)
+    tags = tags[:5]
+    while len(tags) < 5:
+        tags.append("general")
+    return summary, tags
+
+
 class TokenLimitExceeded(Exception):
     """Raised when the text exceeds the LLM token limit."""
     pass
 
 
 class MaxDepthExceeded(Exception):
-    """Raised when maximum recursion depth is reached."""
+    """Raised when the reduce phase cannot shrink the document enough."""
+    pass
+
+
+class LMStudioUnavailable(Exception):
+    """Raised when the LM Studio API cannot be reached."""
     pass
 
 
 def read_md_text(md_path: Path, max_chars: int = None) -> str:
     """Read markdown file and extract text content."""
-    if max_chars is None:
-        max_chars = MAX_CHARS_SAFE * 2  # Allow larger initial read
-    
-    try:
-        with open(md_path, 'r', encoding='utf-8') as f:
-            full_text = f.read()
-    except Exception as e:
-        raise RuntimeError(f"Failed to read markdown file: {e}")
-    
-    # Prevent sending extremely large payloads
-    if len(full_text) > max_chars:
+    full_text = md_path.read_text(encoding='utf-8')
+
+    # Only truncate when an explicit limit is given; the map-reduce
+    # chunking handles arbitrarily large documents on its own
+    if max_chars is not None and len(full_text) > max_chars:
         full_text = full_text[:max_chars] + "\n\n[TRUNCATED]"
-    
+
     return full_text
 
 
-def split_md_file(md_path: Path) -> tuple[Path, Path]:
-    """Split a markdown file into two parts by line count.
-    
-    Returns:
-        tuple[Path, Path]: Paths to the two temporary markdown files
-    """
-    try:
-        with open(md_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-    except Exception as e:
-        raise RuntimeError(f"Failed to read markdown file for splitting: {e}")
-    
-    if len(lines) < 2:
-        raise ValueError("Cannot split markdown file with less than 2 lines")
-    
-    # Split in half (first half gets extra one if odd number)
-    mid_point = (len(lines) + 1) // 2
-    first_half = lines[:mid_point]
-    second_half = lines[mid_point:]
-    
-    # Create temporary file paths
-    base_name = md_path.stem
-    parent_dir = md_path.parent
-    temp_file1 = parent_dir / f"{TEMP_FILE_PREFIX}{base_name}_part1.md"
-    temp_file2 = parent_dir / f"{TEMP_FILE_PREFIX}{base_name}_part2.md"
-    
-    # Write first half
-    try:
-        with open(temp_file1, 'w', encoding='utf-8') as f:
-            f.writelines(first_half)
-    except Exception as e:
-        raise RuntimeError(f"Failed to write temporary file: {e}")
-    
-    # Write second half
-    try:
-        with open(temp_file2, 'w', encoding='utf-8') as f:
-            f.writelines(second_half)
-    except Exception as e:
-        raise RuntimeError(f"Failed to write temporary file: {e}")
-    
-    # Track temporary files for cleanup
-    _temp_files.append(temp_file1)
-    _temp_files.append(temp_file2)
-    
-    return temp_file1, temp_file2
-
-
-def cleanup_temp_files():
-    """Remove all tracked temporary files."""
-    for temp_file in _temp_files:
+# Transient failures worth retrying: connection blips, timeouts, server
+# overload, and mid-stream resets. One blip would otherwise discard the
+# progress of every sibling chunk running in the same asyncio.gather.
+_RETRYABLE_ERRORS = (
+    APIConnectionError,
+    APITimeoutError,
+    RateLimitError,
+    httpx.RemoteProtocolError,
+    httpx.ReadError,
+)
+
+
+async def _call_with_retry(fn, *, tries: int = 4, base: float = 0.5):
+    """Retry fn() on transient errors with exponential backoff + jitter."""
+    for attempt in range(tries):
         try:
-            if temp_file.exists():
-                temp_file.unlink()
-        except Exception as e:
-            print(f"⚠️  Warning: Could not delete temporary file {temp_file}: {e}")
+            return await fn()
+        except _RETRYABLE_ERRORS as e:
+            if attempt == tries - 1:
+                raise
+            delay = base * 2 ** attempt + random.random() * 0.1
+            print(f"⚠️  Transient API error ({e}), retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
 
 
-# Register cleanup function to run on exit
-atexit.register(cleanup_temp_files)
+async def _create_completion(messages: list[dict], **request_kwargs) -> str:
+    """Run a chat completion with stream=True and accumulate the content.
 
+    Streaming starts delivering tokens at first-token latency instead of
+    blocking until the full response is generated, so downstream parsing
+    and printing overlap with the model still writing.
+    """
+    async def _attempt() -> str:
+        stream = await _client.chat.completions.create(
+            model=MODEL_NAME,
+            messages=messages,
+            temperature=TEMPERATURE,
+            timeout=30.0,
+            stream=True,
+            **request_kwargs
+        )
+        parts = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+        return "".join(parts).strip()
 
-def check_api_available() -> bool:
-    """Check if LM Studio API is available."""
     try:
-        # Save original proxy env vars
-        original_http_proxy = os.environ.pop('HTTP_PROXY', None)
-        original_https_proxy = os.environ.pop('HTTPS_PROXY', None)
-        original_all_proxy = os.environ.pop('ALL_PROXY', None)
-        original_no_proxy = os.environ.get('NO_PROXY', '')
-        
-        # Set NO_PROXY to bypass proxy for localhost
-        os.environ['NO_PROXY'] = '127.0.0.1,localhost'
-        # Also clear proxy env vars for httpx
-        os.environ.pop('HTTP_PROXY', None)
-        os.environ.pop('HTTPS_PROXY', None)
-        os.environ.pop('http_proxy', None)
-        os.environ.pop('https_proxy', None)
-        
-        http_client = httpx.Client(timeout=5.0)
-        
-        # Try to connect to the models endpoint
-        response = http_client.get(f"{LM_STUDIO_BASE_URL}/models")
-        http_client.close()
-        
-        # Restore proxy env vars
-        if original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if original_no_proxy:
-            os.environ['NO_PROXY'] = original_no_proxy
-        else:
-            os.environ.pop('NO_PROXY', None)
-        
-        return response.status_code == 200
-    except Exception:
-        # Restore proxy env vars
-        if 'original_http_proxy' in locals() and original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if 'original_https_proxy' in locals() and original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if 'original_all_proxy' in locals() and original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if 'original_no_proxy' in locals():
-            if original_no_proxy:
-                os.environ['NO_PROXY'] = original_no_proxy
-            else:
-                os.environ.pop('NO_PROXY', None)
-        return False
-
-
-def combine_summaries(summary1: str, summary2: str) -> str:
-    """Combine two summaries into one coherent markdown document using LLM."""
-    try:
-        # Save original proxy env vars
-        original_http_proxy = os.environ.pop('HTTP_PROXY', None)
-        original_https_proxy = os.environ.pop('HTTPS_PROXY', None)
-        original_all_proxy = os.environ.pop('ALL_PROXY', None)
-        original_no_proxy = os.environ.get('NO_PROXY', '')
-        
-        # Set NO_PROXY to bypass proxy for localhost
-        os.environ['NO_PROXY'] = '127.0.0.1,localhost'
-        # Also clear proxy env vars for httpx
-        os.environ.pop('HTTP_PROXY', None)
-        os.environ.pop('HTTPS_PROXY', None)
-        os.environ.pop('http_proxy', None)
-        os.environ.pop('https_proxy', None)
-        
-        http_client = httpx.Client(timeout=30.0)
-        
-        client = OpenAI(
-            base_url=LM_STUDIO_BASE_URL,
-            api_key="lm-studio",  # dummy key
-            http_client=http_client
+        return await _call_with_retry(_attempt)
+    except (APIConnectionError, httpx.ConnectError) as e:
+        raise LMStudioUnavailable(
+            f"LM Studio API is not available at {LM_STUDIO_BASE_URL}: {e}"
         )
 
-        prompt = f"""
-Combine the following two summary documents into one coherent Markdown document.
+
+async def combine_summaries(summaries: list[str]) -> tuple[str, list[str]]:
+    """Combine chunk summaries into one document and tag it, in one call."""
+    numbered = "\n\n".join(
+        f"Summary {i}:\n{summary}" for i, summary in enumerate(summaries, 1)
+    )
+    prompt = f"""
+Combine the following {len(summaries)} summary documents into one coherent Markdown document.
 
 Requirements:
-- Merge the two summaries into a single, well-structured document
+- Merge the summaries into a single, well-structured document
 - Start with a clear title (use the most appropriate one or create a new unified title)
 - Use sections with headings
 - Bullet points where appropriate
 - Remove duplicate information
-- Ensure continuity and flow between the two parts
+- Ensure continuity and flow between the parts
 - Maintain focus on key ideas and conclusions
 - Do NOT mention that this comes from multiple parts or that it was combined
 
-First Summary:
-{summary1}
+{numbered}
+{_TAG_ADDENDUM}"""
 
-Second Summary:
-{summary2}
+    content = await _create_completion(
+        [
+            {"role": "system", "content": "You are a precise technical summarizer that combines multiple summaries into coherent documents."},
+            {"role": "user", "content": prompt}
+        ],
+        response_format={"type": "json_object"}
+    )
 
-Return the combined summary as a single Markdown document.
-"""
+    return _parse_tagged_response(content)
 
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
-                {"role": "system", "content": "You are a precise technical summarizer that combines multiple summaries into coherent documents."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=TEMPERATURE,
-            timeout=30.0
-        )
 
-        result = response.choices[0].message.content.strip()
-        http_client.close()
-        
-        # Restore proxy env vars
-        if original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if original_no_proxy:
-            os.environ['NO_PROXY'] = original_no_proxy
-        else:
-            os.environ.pop('NO_PROXY', None)
-        
-        return result
-    except Exception as e:
-        if 'http_client' in locals():
-            http_client.close()
-        # Restore proxy env vars
-        if 'original_http_proxy' in locals() and original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if 'original_https_proxy' in locals() and original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if 'original_all_proxy' in locals() and original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if 'original_no_proxy' in locals():
-            if original_no_proxy:
-                os.environ['NO_PROXY'] = original_no_proxy
-            else:
-                os.environ.pop('NO_PROXY', None)
-        raise
-
-
-def summarize_recursive(text: str, md_path: Path, depth: int = 0) -> str:
-    """Recursively summarize text, splitting if too long.
-    
-    Args:
-        text: The text content to summarize
-        md_path: Path to the original markdown file (for splitting if needed)
-        depth: Current recursion depth
-        
-    Returns:
-        Summarized markdown text
-        
-    Raises:
-        MaxDepthExceeded: If maximum recursion depth is reached
-        TokenLimitExceeded: If text is too long and depth limit reached
+def _chunk_cache_path(chunk: str) -> Path:
+    """Cache file for a chunk, keyed by content, model, and temperature."""
+    key = hashlib.sha256(f"{MODEL_NAME}:{TEMPERATURE}:{chunk}".encode()).hexdigest()
+    return CACHE_DIR / f"{key}.md"
+
+
+async def summarize_cached(chunk: str) -> str:
+    """summarize() with an on-disk cache keyed by chunk content.
+
+    When a document is edited and re-run, only the changed chunks cost
+    an LLM call; everything untouched is served from ~/.cache.
     """
-    # Check depth limit
-    if depth >= MAX_DEPTH:
-        raise MaxDepthExceeded(
-            f"Maximum recursion depth ({MAX_DEPTH}) reached. "
-            f"The markdown file is too long even after {MAX_DEPTH} levels of splitting. "
-            f"Please manually split the file or increase MAX_DEPTH."
-        )
-    
-    # Check if text is too long
-    should_split = len(text) > MAX_CHARS_SAFE
-    
-    if should_split:
-        print(f"📊 Text too long ({len(text)} chars), splitting into 2 parts (depth {depth + 1}/{MAX_DEPTH})...")
-        
-        # Split the markdown file
-        try:
-            temp_file1, temp_file2 = split_md_file(md_path)
-            print(f"   ✓ Split into: {temp_file1.name} and {temp_file2.name}")
-        except Exception as e:
-            raise RuntimeError(f"Failed to split markdown file: {e}")
-        
-        # Read text from split files
-        try:
-            text1 = read_md_text(temp_file1, max_chars=None)  # Read full content
-            text2 = read_md_text(temp_file2, max_chars=None)
-        except Exception as e:
-            raise RuntimeError(f"Failed to read split markdown files: {e}")
-        
-        # Recursively summarize each part
-        print(f"   🧠 Processing part 1/2 (depth {depth + 1}/{MAX_DEPTH})...")
-        try:
-            summary1 = summarize_recursive(text1, temp_file1, depth + 1)
-        except Exception as e:
-            # Clean up temp files before re-raising
-            cleanup_temp_files()
-            raise
-        
-        print(f"   🧠 Processing part 2/2 (depth {depth + 1}/{MAX_DEPTH})...")
-        try:
-            summary2 = summarize_recursive(text2, temp_file2, depth + 1)
-        except Exception as e:
-            # Clean up temp files before re-raising
-            cleanup_temp_files()
-            raise
-        
-        # Combine the summaries
-        print(f"   🔗 Combining summaries (depth {depth + 1}/{MAX_DEPTH})...")
-        try:
-            combined = combine_summaries(summary1, summary2)
-        except Exception as e:
-            cleanup_temp_files()
-            raise RuntimeError(f"Failed to combine summaries: {e}")
-        
-        # Clean up temporary markdown files (but keep summaries if they were saved)
-        try:
-            if temp_file1.exists():
-                temp_file1.unlink()
-            if temp_file2.exists():
-                temp_file2.unlink()
-            # Remove from tracking list
-            if temp_file1 in _temp_files:
-                _temp_files.remove(temp_file1)
-            if temp_file2 in _temp_files:
-                _temp_files.remove(temp_file2)
-        except Exception as e:
-            print(f"⚠️  Warning: Could not delete temporary files: {e}")
-        
-        return combined
-    
-    # Text is within safe limit, try to summarize
+    cache_path = _chunk_cache_path(chunk)
     try:
-        return summarize(text)
-    except TokenLimitExceeded:
-        # If we hit token limit and haven't reached max depth, force splitting
-        if depth < MAX_DEPTH:
-            print(f"⚠️  Token limit exceeded (text length: {len(text)}), forcing split (depth {depth + 1}/{MAX_DEPTH})...")
-            # Force splitting by going through the splitting path
-            # Split the markdown file
-            try:
-                temp_file1, temp_file2 = split_md_file(md_path)
-                print(f"   ✓ Split into: {temp_file1.name} and {temp_file2.name}")
-            except Exception as e:
-                raise RuntimeError(f"Failed to split markdown file: {e}")
-            
-            # Read text from split files
-            try:
-                text1 = read_md_text(temp_file1, max_chars=None)
-                text2 = read_md_text(temp_file2, max_chars=None)
-            except Exception as e:
-                raise RuntimeError(f"Failed to read split markdown files: {e}")
-            
-            # Recursively summarize each part
-            print(f"   🧠 Processing part 1/2 (depth {depth + 1}/{MAX_DEPTH})...")
-            try:
-                summary1 = summarize_recursive(text1, temp_file1, depth + 1)
-            except Exception as e:
-                cleanup_temp_files()
-                raise
-            
-            print(f"   🧠 Processing part 2/2 (depth {depth + 1}/{MAX_DEPTH})...")
-            try:
-                summary2 = summarize_recursive(text2, temp_file2, depth + 1)
-            except Exception as e:
-                cleanup_temp_files()
-                raise
-            
-            # Combine the summaries
-            print(f"   🔗 Combining summaries (depth {depth + 1}/{MAX_DEPTH})...")
-            try:
-                combined = combine_summaries(summary1, summary2)
-            except Exception as e:
-                cleanup_temp_files()
-                raise RuntimeError(f"Failed to combine summaries: {e}")
-            
-            # Clean up temporary markdown files
-            try:
-                if temp_file1.exists():
-                    temp_file1.unlink()
-                if temp_file2.exists():
-                    temp_file2.unlink()
-                if temp_file1 in _temp_files:
-                    _temp_files.remove(temp_file1)
-                if temp_file2 in _temp_files:
-                    _temp_files.remove(temp_file2)
-            except Exception as e:
-                print(f"⚠️  Warning: Could not delete temporary files: {e}")
-            
-            return combined
-        else:
-            raise MaxDepthExceeded(
-                f"Maximum recursion depth ({MAX_DEPTH}) reached. "
-                f"The text segment is still too long. Please manually split the file or increase MAX_DEPTH."
-            )
-
-
-def generate_tags(summary: str) -> list[str]:
-    """Generate top 5 relevant tags for a summary using LLM."""
+        return cache_path.read_text(encoding="utf-8")
+    except OSError:
+        pass
+
+    summary = await summarize(chunk)
     try:
-        # Save original proxy env vars
-        original_http_proxy = os.environ.pop('HTTP_PROXY', None)
-        original_https_proxy = os.environ.pop('HTTPS_PROXY', None)
-        original_all_proxy = os.environ.pop('ALL_PROXY', None)
-        original_no_proxy = os.environ.get('NO_PROXY', '')
-        
-        # Set NO_PROXY to bypass proxy for localhost
-        os.environ['NO_PROXY'] = '127.0.0.1,localhost'
-        # Also clear proxy env vars for httpx
-        os.environ.pop('HTTP_PROXY', None)
-        os.environ.pop('HTTPS_PROXY', None)
-        os.environ.pop('http_proxy', None)
-        os.environ.pop('https_proxy', None)
-        
-        http_client = httpx.Client(timeout=30.0)
-        
-        client = OpenAI(
-            base_url=LM_STUDIO_BASE_URL,
-            api_key="lm-studio",  # dummy key
-            http_client=http_client
-        )
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(summary, encoding="utf-8")
+    except OSError as e:
+        print(f"⚠️  Warning: Could not write summary cache: {e}")
+    return summary
 
-        prompt = f"""
-Analyze the following summary document and generate exactly 5 relevant tags that best describe its main topics and themes.
 
-Requirements:
-- Generate exactly 5 tags
-- Tags should be concise (1-3 words each)
-- Tags should be lowercase
-- Use commas to separate tags
-- Focus on the main topics, themes, and subject matter
-- Do NOT include generic words like "summary", "discussion", "document"
-- Return ONLY the tags separated by commas, no numbering, no explanations
-
-Summary:
-{summary}
-
-Return format example: tag1, tag2, tag3, tag4, tag5
-"""
+def chunk_text(text: str, max_chars: int = MAX_CHARS_SAFE) -> list[str]:
+    """Split text into chunks of at most max_chars characters.
 
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that generates relevant tags for documents."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=TEMPERATURE,
-            timeout=30.0
-        )
+    Cuts at the last blank line (or, failing that, heading) inside each
+    window so code fences, lists, and paragraphs aren't cleaved
+    mid-block — fragments cut mid-structure summarize worse and retry
+    more often. Falls back to a hard cut when a window has no boundary.
+    """
+    chunks = []
+    pos = 0
+    text_len = len(text)
+    while text_len - pos > max_chars:
+        window_end = pos + max_chars
+        cut = text.rfind("\n\n", pos, window_end)
+        if cut <= pos:
+            cut = text.rfind("\n#", pos, window_end)
+        if cut <= pos:
+            cut = window_end
+        chunks.append(text[pos:cut])
+        pos = cut
+    chunks.append(text[pos:])
+    return chunks
+
+
+async def _summarize_with_split(chunk: str, max_chars: int = MAX_CHARS_SAFE) -> str:
+    """Summarize one chunk, force-splitting when it blows the token limit.
+
+    A chunk under the character budget can still exceed the model's
+    token budget — CJK text runs close to one token per character — so
+    halve the window, summarize the pieces concurrently, and join them.
+    """
+    try:
+        return await summarize_cached(chunk)
+    except TokenLimitExceeded:
+        # Halve relative to what the chunk actually holds, so chunks
+        # already below max_chars still split into at least two pieces
+        halved = min(max_chars, len(chunk)) // 2
+        pieces = chunk_text(chunk, halved)
+        if len(pieces) < 2 or halved < 500:
+            raise
+        print(f"   ⚠️  Chunk over the token limit; re-splitting at {halved} chars...")
+        summaries = await asyncio.gather(*(_summarize_with_split(p, halved) for p in pieces))
+        return "\n\n".join(summaries)
 
-        result = response.choices[0].message.content.strip()
-        http_client.close()
-        
-        # Restore proxy env vars
-        if original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if original_no_proxy:
-            os.environ['NO_PROXY'] = original_no_proxy
-        else:
-            os.environ.pop('NO_PROXY', None)
-        
-        # Parse tags from response
-        tags = [tag.strip() for tag in result.split(',')]
-        tags = [tag for tag in tags if tag]  # Remove empty tags
-        
-        # Ensure we have exactly 5 tags (pad or trim if needed)
-        if len(tags) > 5:
-            tags = tags[:5]
-        elif len(tags) < 5:
-            # If we have fewer than 5, try to extract more from the summary
-            # For now, just pad with generic tags if needed
-            while len(tags) < 5:
-                tags.append("general")
-        
-        return tags[:5]
-        
-    except Exception as e:
-        if 'http_client' in locals():
-            http_client.close()
-        # Restore proxy env vars
-        if 'original_http_proxy' in locals() and original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if 'original_https_proxy' in locals() and original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if 'original_all_proxy' in locals() and original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if 'original_no_proxy' in locals():
-            if original_no_proxy:
-                os.environ['NO_PROXY'] = original_no_proxy
-            else:
-                os.environ.pop('NO_PROXY', None)
-        # Return default tags if generation fails
-        print(f"⚠️  Warning: Could not generate tags: {e}")
-        return ["general", "summary", "document", "content", "notes"]
+
+async def summarize_document(text: str) -> tuple[str, list[str]]:
+    """Summarize and tag a document with one map and one reduce round.
+
+    Maps all chunks through summarize() concurrently, then combines the
+    chunk summaries in a single call — two LLM rounds regardless of
+    document size, instead of the old halving recursion's log(N)
+    sequential split/combine cascade. If the combined summaries are
+    still over budget, the same map step is repeated on them (bounded
+    by MAX_REDUCE_ROUNDS).
+    """
+    chunks = chunk_text(text)
+
+    for round_num in range(MAX_REDUCE_ROUNDS):
+        if len(chunks) == 1:
+            try:
+                return await summarize(chunks[0], with_tags=True)
+            except TokenLimitExceeded:
+                # Fits the char budget but not the token budget (CJK);
+                # force-split and fall through to the map-reduce path
+                print(f"   ⚠️  Document over the token limit; force-splitting...")
+                chunks = chunk_text(chunks[0], MAX_CHARS_SAFE // 2)
+                if len(chunks) == 1:
+                    raise
+                continue
+
+        print(f"📊 Summarizing {len(chunks)} chunk(s) concurrently (round {round_num + 1}/{MAX_REDUCE_ROUNDS})...")
+        summaries = await asyncio.gather(*(_summarize_with_split(chunk) for chunk in chunks))
+
+        combined = "\n\n".join(summaries)
+        if len(combined) <= MAX_CHARS_SAFE:
+            print(f"   🔗 Combining {len(summaries)} summaries...")
+            return await combine_summaries(summaries)
+
+        # Summaries themselves are over budget; map-reduce them again
+        chunks = chunk_text(combined)
+
+    raise MaxDepthExceeded(
+        f"Could not reduce the document below {MAX_CHARS_SAFE} chars "
+        f"in {MAX_REDUCE_ROUNDS} rounds. Please manually split the file "
+        f"or increase MAX_REDUCE_ROUNDS."
+    )
 
 
 def format_summary_with_tags(summary: str, tags: list[str]) -> str:
     """Format summary with frontmatter tags.
-    
+
     Format:
     ---
     tag: tag1, tag2, tag3, tag4, tag5
@@ -524,62 +320,23 @@ def format_summary_with_tags(summary: str, tags: list[str]) -> str:
     <main body>
     """
     tags_str = ", ".join(tags)
-    
-    # Check if summary already has frontmatter
-    if summary.strip().startswith('---'):
-        # Extract existing frontmatter and content
-        parts = summary.split('---', 2)
-        if len(parts) >= 3:
-            # Has frontmatter, replace or merge it
-            existing_frontmatter = parts[1].strip()
-            content = parts[2].strip()
-            # Check if tag already exists in frontmatter
-            if 'tag:' in existing_frontmatter:
-                # Replace existing tag line
-                lines = existing_frontmatter.split('\n')
-                new_lines = []
-                for line in lines:
-                    if line.strip().startswith('tag:'):
-                        new_lines.append(f"tag: {tags_str}")
-                    else:
-                        new_lines.append(line)
-                new_frontmatter = '\n'.join(new_lines)
-                return f"---\n{new_frontmatter}\n---\n\n{content}"
-            else:
-                # Add tag to existing frontmatter
-                return f"---\n{existing_frontmatter}\ntag: {tags_str}\n---\n\n{content}"
-    
-    # No frontmatter, add it before the content
-    frontmatter = f"---\ntag: {tags_str}\n---\n\n"
-    return frontmatter + summary
-
-
-def summarize(text: str) -> str:
-    try:
-        # Create HTTP client that bypasses proxy for localhost
-        # Save original proxy env vars
-        original_http_proxy = os.environ.pop('HTTP_PROXY', None)
-        original_https_proxy = os.environ.pop('HTTPS_PROXY', None)
-        original_all_proxy = os.environ.pop('ALL_PROXY', None)
-        original_no_proxy = os.environ.get('NO_PROXY', '')
-        
-        # Set NO_PROXY to bypass proxy for localhost
-        os.environ['NO_PROXY'] = '127.0.0.1,localhost'
-        # Also clear proxy env vars for httpx
-        os.environ.pop('HTTP_PROXY', None)
-        os.environ.pop('HTTPS_PROXY', None)
-        os.environ.pop('http_proxy', None)
-        os.environ.pop('https_proxy', None)
-        
-        http_client = httpx.Client(timeout=30.0)
-        
-        client = OpenAI(
-            base_url=LM_STUDIO_BASE_URL,
-            api_key="lm-studio",  # dummy key
-            http_client=http_client
-        )
 
-        prompt = f"""
+    match = _FRONTMATTER_RE.match(summary)
+    if match is None:
+        # No frontmatter, add it before the content
+        return f"---\ntag: {tags_str}\n---\n\n{summary}"
+
+    frontmatter = match.group(1)
+    content = summary[match.end():].strip()
+    if 'tag:' in frontmatter:
+        frontmatter = _TAG_LINE_RE.sub(f"tag: {tags_str}", frontmatter)
+    else:
+        frontmatter = f"{frontmatter}\ntag: {tags_str}"
+    return f"---\n{frontmatter}\n---\n\n{content}"
+
+
+async def summarize(text: str, with_tags: bool = False):
+    prompt = f"""
 Summarize the following document into a clean Markdown document.
 
 Requirements:
@@ -593,56 +350,33 @@ Requirements:
 Document:
 {text}
 """
+    request_kwargs = {}
+    if with_tags:
+        prompt += _TAG_ADDENDUM
+        request_kwargs["response_format"] = {"type": "json_object"}
 
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
+    try:
+        content = await _create_completion(
+            [
                 {"role": "system", "content": "You are a precise technical summarizer."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=TEMPERATURE,
-            timeout=30.0
+            **request_kwargs
         )
-
-        result = response.choices[0].message.content.strip()
-        http_client.close()
-        # Restore proxy env vars
-        if original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if original_no_proxy:
-            os.environ['NO_PROXY'] = original_no_proxy
-        else:
-            os.environ.pop('NO_PROXY', None)
-        return result
     except Exception as e:
-        if 'http_client' in locals():
-            http_client.close()
-        # Restore proxy env vars
-        if 'original_http_proxy' in locals() and original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if 'original_https_proxy' in locals() and original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if 'original_all_proxy' in locals() and original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if 'original_no_proxy' in locals():
-            if original_no_proxy:
-                os.environ['NO_PROXY'] = original_no_proxy
-            else:
-                os.environ.pop('NO_PROXY', None)
-        
         # Check if this is a token limit error
         error_str = str(e).lower()
         if '400' in error_str or 'token' in error_str or 'context length' in error_str or 'context_length' in error_str:
             raise TokenLimitExceeded(f"Text exceeds LLM token limit: {e}")
-        
+
         raise  # Re-raise other exceptions
 
+    if with_tags:
+        return _parse_tagged_response(content)
+    return content
 
-def main():
+
+async def _main_async():
     if len(sys.argv) != 2:
         print("Usage: python md_summarise_by_llm.py path/to/file.md")
         sys.exit(1)
@@ -654,16 +388,20 @@ def main():
         sys.exit(1)
 
     print(f"📄 Reading: {md_path}")
-    text = read_md_text(md_path, max_chars=None)  # Read full content for recursive processing
-    
+    text = read_md_text(md_path, max_chars=None)  # Read full content for chunked processing
+
     if not text.strip():
         print("⚠️  Warning: No text found in markdown file")
         sys.exit(1)
 
-    # Check if LM Studio API is available
-    print("🔍 Checking if LM Studio API is available...")
-    if not check_api_available():
-        print(f"\n❌ Error: LM Studio API is not available at {LM_STUDIO_BASE_URL}")
+    print("🧠 Summarizing with openai/gpt-oss-20b...")
+    try:
+        summary_md, tags = await summarize_document(text)
+    except KeyboardInterrupt:
+        print("\n⚠️  Interrupted by user")
+        sys.exit(1)
+    except LMStudioUnavailable as e:
+        print(f"\n❌ Error: {e}")
         print("\n💡 Reminder:")
         print("   Please make sure LM Studio is running and the model is loaded.")
         print(f"   The API should be accessible at: {LM_STUDIO_BASE_URL}")
@@ -673,28 +411,18 @@ def main():
         print(f"   3. Start the local server (check the port matches: {LM_STUDIO_BASE_URL})")
         print(f"   4. Run this script again")
         sys.exit(1)
-
-    print("🧠 Summarizing with openai/gpt-oss-20b...")
-    try:
-        summary_md = summarize_recursive(text, md_path)
-    except KeyboardInterrupt:
-        print("\n⚠️  Interrupted by user")
-        cleanup_temp_files()
-        sys.exit(1)
     except MaxDepthExceeded as e:
         print(f"\n❌ Error: {e}")
         print("\n💡 Suggestion:")
         print("   The markdown file is extremely long. Consider:")
         print("   1. Manually splitting the file into smaller parts")
-        print("   2. Increasing MAX_DEPTH in the script (if your system can handle it)")
+        print("   2. Increasing MAX_REDUCE_ROUNDS in the script (if your system can handle it)")
         print("   3. Using a model with a larger context window")
-        cleanup_temp_files()
         sys.exit(1)
     except TokenLimitExceeded as e:
         print(f"\n❌ Error: {e}")
-        print("\n💡 This should not happen - the recursive splitting should handle this.")
+        print("\n💡 This should not happen - the map-reduce chunking should handle this.")
         print("   Please report this issue.")
-        cleanup_temp_files()
         sys.exit(1)
     except Exception as e:
         print(f"\n❌ Error during summarization: {e}")
@@ -703,30 +431,32 @@ def main():
         print("   1. LM Studio is running")
         print(f"   2. The model ({MODEL_NAME}) is loaded and server is started")
         print(f"   3. The API is accessible at: {LM_STUDIO_BASE_URL}")
-        cleanup_temp_files()
         sys.exit(1)
 
-    # Generate tags for the summary
-    print("🏷️  Generating tags...")
-    try:
-        tags = generate_tags(summary_md)
-        print(f"   ✓ Generated tags: {', '.join(tags)}")
-    except Exception as e:
-        print(f"⚠️  Warning: Could not generate tags: {e}")
-        tags = ["general", "summary", "document", "content", "notes"]
-    
+    print(f"🏷️  Tags: {', '.join(tags)}")
+
     # Format summary with tags
     formatted_summary = format_summary_with_tags(summary_md, tags)
-    
+
     output_path = md_path.with_suffix(".summary.md")
     output_path.write_text(formatted_summary, encoding="utf-8")
 
     print(f"✅ Summary written to: {output_path}")
-    
-    # Final cleanup
-    cleanup_temp_files()
+
+
+async def main_async():
+    # Close the pooled connections while their event loop is still
+    # running; closing them later (e.g. from atexit on a fresh loop)
+    # raises "Event loop is closed"
+    try:
+        await _main_async()
+    finally:
+        await _http_client.aclose()
+
+
+def main():
+    asyncio.run(main_async())
 
 
 if __name__ == "__main__":
     main()
-
@@ -8,7 +8,7 @@ setup(
     author="Billy Wang",
     py_modules=["whisper_speech_to_srt", "srt_to_txt", "srt_to_lrc"],
     install_requires=[
-        "openai-whisper",
+        "faster-whisper",
     ],
     entry_points={
         "console_scripts": [
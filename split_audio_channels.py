@@ -1,91 +1,101 @@
 import sys
 import os
-from pydub import AudioSegment
+import functools
+import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 
+# Timing prints are on by default; set WHISPER_SRT_VERBOSE=0 to silence
+_VERBOSE = os.environ.get('WHISPER_SRT_VERBOSE', '1') != '0'
+
+def timeit(fn):
+    """Print the wall time of a call when _VERBOSE is set."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        if _VERBOSE:
+            print(f"{fn.__name__}: {time.perf_counter() - start:.2f} seconds")
+        return result
+    return wrapper
+
+# Supported input formats, built once at import time
+_SUPPORTED_FORMATS = frozenset({'.m4a', '.wav', '.mp3', '.aac', '.flac', '.ogg', '.wma'})
+
+def get_channel_count(input_file):
+    """Return the channel count of the first audio stream via ffprobe.
+
+    A metadata-only probe instead of decoding the whole file just to ask
+    how many channels it has.
+    """
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "a:0",
+         "-show_entries", "stream=channels", "-of", "csv=p=0", input_file],
+        check=True, capture_output=True, text=True
+    )
+    return int(result.stdout.strip())
+
+@timeit
 def split_audio_channels(input_file):
-    start_time = time.time()
-    
     # Validate input file
     if not os.path.exists(input_file):
         print(f"Error: File '{input_file}' does not exist")
         return
-    
-    # Supported input formats
-    supported_formats = {'.m4a', '.wav', '.mp3', '.aac', '.flac', '.ogg', '.wma'}
+
     file_ext = os.path.splitext(input_file)[1].lower()
-    
-    if file_ext not in supported_formats:
-        print(f"Error: Unsupported input format. Supported formats: {', '.join(supported_formats)}")
+
+    if file_ext not in _SUPPORTED_FORMATS:
+        print(f"Error: Unsupported input format. Supported formats: {', '.join(_SUPPORTED_FORMATS)}")
         return
-    
+
     try:
-        # First, try to auto-detect format by letting ffmpeg handle it
-        try:
-            audio = AudioSegment.from_file(input_file)
-            print(f"Auto-detected format successfully")
-        except Exception as auto_detect_error:
-            print(f"Auto-detection failed, trying with file extension hint...")
-            # Fallback: Load audio file with appropriate format based on extension
-            format_map = {
-                '.m4a': 'm4a',
-                '.wav': 'wav',
-                '.mp3': 'mp3',
-                '.aac': 'adts',
-                '.flac': 'flac',
-                '.ogg': 'ogg',
-                '.wma': 'wma'
-            }
-            
-            audio_format = format_map.get(file_ext, file_ext[1:])
-            audio = AudioSegment.from_file(input_file, format=audio_format)
-        
-        # Check channel count
-        channel_count = audio.channels
+        channel_count = get_channel_count(input_file)
         print(f"Audio channels detected: {channel_count}")
-        
+
         if channel_count == 1:
             print("Warning: Audio file is mono (single channel). Skipping processing.")
             print("This script only processes stereo or multi-channel audio files.")
             return
-        
-        # Split into separate channels
-        print(f"Splitting audio into {channel_count} separate channels...")
-        channels = audio.split_to_mono()
-        
+
         # Prepare output file paths
-        output_dir = os.path.dirname(input_file)
-        base_name = os.path.splitext(os.path.basename(input_file))[0]
-        
-        # Export left channel (first channel)
-        left_output = os.path.join(output_dir, f"{base_name}_L.mp3")
-        channels[0].export(left_output, format="mp3", codec="libmp3lame")
-        print(f"Left channel saved to: {left_output}")
-        
-        # Export right channel (second channel)
-        right_output = os.path.join(output_dir, f"{base_name}_R.mp3")
-        channels[1].export(right_output, format="mp3", codec="libmp3lame")
-        print(f"Right channel saved to: {right_output}")
-        
+        input_path = Path(input_file)
+        left_output = str(input_path.with_name(f"{input_path.stem}_L.mp3"))
+        right_output = str(input_path.with_name(f"{input_path.stem}_R.mp3"))
+
+        # One ffmpeg process per channel, run concurrently. libmp3lame
+        # is single-threaded per stream, so two independent encoders
+        # finish in ~max(L, R) wall time instead of L + R; decoding is
+        # cheap next to the encode, so doing it twice costs little. The
+        # PCM never crosses into Python either way. pan= works for any
+        # layout with at least two channels, unlike channelsplit which
+        # needs an exact channel_layout.
+        print(f"Splitting audio into separate channels...")
+        jobs = {}
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            for channel, output in ((0, left_output), (1, right_output)):
+                future = pool.submit(
+                    subprocess.run,
+                    ["ffmpeg", "-y", "-i", input_file,
+                     "-filter_complex", f"[0:a]pan=mono|c0=c{channel}[out]",
+                     "-map", "[out]", "-c:a", "libmp3lame", output],
+                    check=True, capture_output=True, text=True
+                )
+                jobs[future] = output
+            for future in as_completed(jobs):
+                future.result()  # surface encode failures immediately
+                print(f"Channel saved to: {jobs[future]}")
+
         # If there are more than 2 channels, inform the user
         if channel_count > 2:
             print(f"Note: Audio has {channel_count} channels. Only left (channel 1) and right (channel 2) were exported.")
-        
+
         print("Successfully split audio channels!")
-        
-        # Calculate and print processing time
-        end_time = time.time()
-        print(f"Processing time: {end_time - start_time:.2f} seconds")
-        
+
+    except subprocess.CalledProcessError as e:
+        print(f"Error during channel splitting: {e.stderr}")
     except Exception as e:
         print(f"Error during channel splitting: {str(e)}")
-        # Run ffmpeg directly for debugging
-        import subprocess
-        result = subprocess.run(
-            ["ffmpeg", "-i", input_file, "-f", "null", "-"],
-            capture_output=True, text=True
-        )
-        print("ffmpeg stderr:", result.stderr)
 
 def main():
     # Check command line arguments
@@ -94,10 +104,9 @@ def main():
         print("\nThis script splits stereo audio files into separate left and right channel MP3 files.")
         print("Output files will be named: <filename>_L.mp3 and <filename>_R.mp3")
         sys.exit(1)
-    
+
     input_file = sys.argv[1]
     split_audio_channels(input_file)
 
 if __name__ == "__main__":
     main()
-
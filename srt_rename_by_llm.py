@@ -14,12 +14,10 @@ The script will:
 """
 
 import sys
-import os
+import functools
 from pathlib import Path
 from datetime import datetime
-import pysrt
-from openai import OpenAI
-import httpx
+import mmap
 import re
 
 # ---------------- CONFIG ----------------
@@ -29,19 +27,43 @@ TEMPERATURE = 0.3
 MAX_CHARS = 2000  # Use first part for topic extraction
 # ---------------------------------------
 
+# Cue blocks are separated by a blank line
+_SRT_BLOCK_RE = re.compile(r'\r?\n\r?\n')
+
 
 def read_srt_text(srt_path: Path, max_chars: int = MAX_CHARS) -> str:
-    """Read SRT file and extract text content."""
+    """Read SRT file and extract text content.
+
+    Splits the raw bytes into cue blocks and drops the index/timestamp
+    lines instead of running pysrt's full parse — only the text is
+    needed here, so allocating a SubRipItem (with parsed index and
+    timestamps) per cue was pure overhead. mmap lets the kernel page
+    the file in without an extra userspace copy.
+    """
     try:
-        subs = pysrt.open(str(srt_path), encoding="utf-8")
+        # mmap refuses zero-length files, so an empty SRT just yields no text
+        if srt_path.stat().st_size == 0:
+            return ""
+
+        with open(srt_path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            data = m.read().decode('utf-8-sig', 'replace')
+
         lines = []
-        for sub in subs:
-            text = sub.text.replace("\n", " ").strip()
+        total = 0
+        for block in _SRT_BLOCK_RE.split(data):
+            # Drop the index and timestamp lines; join any wrapped text
+            text = " ".join(block.splitlines()[2:]).strip()
             if text:
                 lines.append(text)
-        
+                total += len(text) + 1  # +1 for the joining newline
+                if total > max_chars:
+                    # Already past the truncation point; no need to
+                    # parse the rest of the file
+                    break
+
         full_text = "\n".join(lines)
-        
+
         # Return first part for topic extraction
         if len(full_text) > max_chars:
             return full_text[:max_chars] + "..."
@@ -51,35 +73,38 @@ def read_srt_text(srt_path: Path, max_chars: int = MAX_CHARS) -> str:
         sys.exit(1)
 
 
+# Date patterns scanned by extract_date_from_filename, compiled once at
+# import. yyyy-mm-dd and yyyy/mm/dd share one alternation so the
+# filename is only scanned once for both separator styles.
+_DATE_COMPACT_RE = re.compile(r'(\d{4})(\d{2})(\d{2})')
+_DATE_PATTERNS = [
+    (re.compile(r'(\d{4})[-/](\d{2})[-/](\d{2})'),
+     lambda m: f"{m.group(1)}{m.group(2)}{m.group(3)}"),  # yyyy-mm-dd or yyyy/mm/dd
+    (re.compile(r'(\d{2})(\d{2})(\d{4})'),
+     lambda m: f"{m.group(3)}{m.group(1)}{m.group(2)}"),  # mmddyyyy
+]
+
+
 def extract_date_from_filename(filename: str) -> str:
     """Try to extract date from filename, return yyyymmdd format."""
     # Try to find all 8-digit sequences and validate them as dates
     # This avoids matching phone numbers by validating the date
-    
+
     # Find all potential 8-digit date patterns
-    all_matches = re.finditer(r'(\d{4})(\d{2})(\d{2})', filename)
-    
+    all_matches = _DATE_COMPACT_RE.finditer(filename)
+
     for match in all_matches:
         year = int(match.group(1))
         month = int(match.group(2))
         day = int(match.group(3))
-        
-        # Validate it's a reasonable date (prioritize recent dates)
-        if 2000 <= year <= 2100 and 1 <= month <= 12 and 1 <= day <= 31:
-            return f"{match.group(1)}{match.group(2)}{match.group(3)}"
-        # Also accept dates from 1990-1999
-        elif 1990 <= year <= 1999 and 1 <= month <= 12 and 1 <= day <= 31:
+
+        # Validate it's a reasonable date (anything from 1990 on)
+        if 1990 <= year <= 2100 and 1 <= month <= 12 and 1 <= day <= 31:
             return f"{match.group(1)}{match.group(2)}{match.group(3)}"
-    
+
     # Try patterns with separators
-    patterns = [
-        (r'(\d{4})-(\d{2})-(\d{2})', lambda m: f"{m.group(1)}{m.group(2)}{m.group(3)}"),  # yyyy-mm-dd
-        (r'(\d{4})/(\d{2})/(\d{2})', lambda m: f"{m.group(1)}{m.group(2)}{m.group(3)}"),  # yyyy/mm/dd
-        (r'(\d{2})(\d{2})(\d{4})', lambda m: f"{m.group(3)}{m.group(1)}{m.group(2)}"),  # mmddyyyy
-    ]
-    
-    for pattern, formatter in patterns:
-        match = re.search(pattern, filename)
+    for pattern, formatter in _DATE_PATTERNS:
+        match = pattern.search(filename)
         if match:
             try:
                 date_str = formatter(match)
@@ -91,7 +116,7 @@ def extract_date_from_filename(filename: str) -> str:
                         return date_str
             except:
                 continue
-    
+
     # If no date found, return None
     return None
 
@@ -116,84 +141,49 @@ def get_file_date(srt_path: Path) -> str:
     return datetime.fromtimestamp(creation_time).strftime("%Y%m%d")
 
 
-def check_api_available() -> bool:
-    """Check if LM Studio API is available."""
+# One client per process: the pooled connection is reused across calls
+# instead of redoing TCP setup each time, and trust_env=False makes
+# httpx ignore HTTP(S)_PROXY etc. entirely, so the localhost LM Studio
+# connection needs no env-var juggling at all.
+# httpx and openai are imported lazily in here: together they cost a
+# few hundred ms of cold start, which an interactive CLI pays before
+# argv validation even runs if they sit at module top.
+@functools.lru_cache(maxsize=1)
+def _get_http_client():
+    import httpx
+    return httpx.Client(timeout=30.0, trust_env=False)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_client():
+    from openai import OpenAI
+    return OpenAI(
+        base_url=LM_STUDIO_BASE_URL,
+        api_key="lm-studio",  # dummy key
+        http_client=_get_http_client(),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _api_alive(base_url: str) -> bool:
     try:
-        # Save original proxy env vars
-        original_http_proxy = os.environ.pop('HTTP_PROXY', None)
-        original_https_proxy = os.environ.pop('HTTPS_PROXY', None)
-        original_all_proxy = os.environ.pop('ALL_PROXY', None)
-        original_no_proxy = os.environ.get('NO_PROXY', '')
-        
-        # Set NO_PROXY to bypass proxy for localhost
-        os.environ['NO_PROXY'] = '127.0.0.1,localhost'
-        # Also clear proxy env vars for httpx
-        os.environ.pop('HTTP_PROXY', None)
-        os.environ.pop('HTTPS_PROXY', None)
-        os.environ.pop('http_proxy', None)
-        os.environ.pop('https_proxy', None)
-        
-        http_client = httpx.Client(timeout=5.0)
-        
-        # Try to connect to the models endpoint
-        response = http_client.get(f"{LM_STUDIO_BASE_URL}/models")
-        http_client.close()
-        
-        # Restore proxy env vars
-        if original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if original_no_proxy:
-            os.environ['NO_PROXY'] = original_no_proxy
-        else:
-            os.environ.pop('NO_PROXY', None)
-        
-        return response.status_code == 200
+        # trust_env=False on the shared client already bypasses any
+        # proxy env vars for the localhost connection
+        return _get_http_client().get(f"{base_url}/models", timeout=5.0).status_code == 200
     except Exception:
-        # Restore proxy env vars
-        if 'original_http_proxy' in locals() and original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if 'original_https_proxy' in locals() and original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if 'original_all_proxy' in locals() and original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if 'original_no_proxy' in locals():
-            if original_no_proxy:
-                os.environ['NO_PROXY'] = original_no_proxy
-            else:
-                os.environ.pop('NO_PROXY', None)
         return False
 
 
+def check_api_available() -> bool:
+    """Check if LM Studio API is available (probed once per process)."""
+    return _api_alive(LM_STUDIO_BASE_URL)
+
+
 def suggest_filenames(text: str, date_str: str) -> list[str]:
     """Use LLM to suggest 5 filename options."""
-    try:
-        # Save original proxy env vars
-        original_http_proxy = os.environ.pop('HTTP_PROXY', None)
-        original_https_proxy = os.environ.pop('HTTPS_PROXY', None)
-        original_all_proxy = os.environ.pop('ALL_PROXY', None)
-        original_no_proxy = os.environ.get('NO_PROXY', '')
-        
-        # Set NO_PROXY to bypass proxy for localhost
-        os.environ['NO_PROXY'] = '127.0.0.1,localhost'
-        # Also clear proxy env vars for httpx
-        os.environ.pop('HTTP_PROXY', None)
-        os.environ.pop('HTTPS_PROXY', None)
-        os.environ.pop('http_proxy', None)
-        os.environ.pop('https_proxy', None)
-        
-        http_client = httpx.Client(timeout=30.0)
-        
-        client = OpenAI(
-            base_url=LM_STUDIO_BASE_URL,
-            api_key="lm-studio",  # dummy key
-            http_client=http_client
-        )
+    client = _get_client()
 
-        prompt = f"""Based on the following transcript excerpt, suggest 5 different filename options in the format: {date_str}-<topic>
+    prompt = f"""Based on the following transcript excerpt, suggest 5 different filename options in the format: {date_str}-<topic>
 
 Requirements:
 - Each filename should be in format: {date_str}-<topic>
@@ -214,79 +204,50 @@ Return format (example):
 {date_str}-doctor-visit-conversation
 """
 
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that suggests concise, descriptive filenames."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=TEMPERATURE,
-            timeout=30.0
-        )
-
-        result = response.choices[0].message.content.strip()
-        http_client.close()
-        
-        # Restore proxy env vars
-        if original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if original_no_proxy:
-            os.environ['NO_PROXY'] = original_no_proxy
-        else:
-            os.environ.pop('NO_PROXY', None)
-        
-        # Parse the suggestions
-        suggestions = []
-        for line in result.split('\n'):
-            line = line.strip()
-            if line and not line.startswith('#') and not line.startswith('//'):
-                # Extract filename if LLM added extra text
-                if date_str in line:
-                    # Extract the part after date
-                    parts = line.split(date_str + '-', 1)
-                    if len(parts) > 1:
-                        topic = parts[1].split()[0]  # Take first word/topic
-                        suggestions.append(f"{date_str}-{topic}")
-                    else:
-                        suggestions.append(line)
-                elif line.startswith(date_str):
+    response = client.chat.completions.create(
+        model=MODEL_NAME,
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant that suggests concise, descriptive filenames."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=TEMPERATURE,
+        timeout=30.0
+    )
+
+    result = response.choices[0].message.content.strip()
+
+    # Parse the suggestions
+    suggestions = []
+    for line in result.split('\n'):
+        line = line.strip()
+        if line and not line.startswith('#') and not line.startswith('//'):
+            # Extract filename if LLM added extra text
+            if date_str in line:
+                # Extract the part after date
+                parts = line.split(date_str + '-', 1)
+                if len(parts) > 1:
+                    topic = parts[1].split()[0]  # Take first word/topic
+                    suggestions.append(f"{date_str}-{topic}")
+                else:
                     suggestions.append(line)
-        
-        # Ensure we have exactly 5 suggestions
-        while len(suggestions) < 5:
-            suggestions.append(f"{date_str}-topic-{len(suggestions) + 1}")
-        
-        return suggestions[:5]
-        
-    except Exception as e:
-        if 'http_client' in locals():
-            http_client.close()
-        # Restore proxy env vars
-        if 'original_http_proxy' in locals() and original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if 'original_https_proxy' in locals() and original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if 'original_all_proxy' in locals() and original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if 'original_no_proxy' in locals():
-            if original_no_proxy:
-                os.environ['NO_PROXY'] = original_no_proxy
-            else:
-                os.environ.pop('NO_PROXY', None)
-        raise
+            elif line.startswith(date_str):
+                suggestions.append(line)
+
+    # Ensure we have exactly 5 suggestions
+    while len(suggestions) < 5:
+        suggestions.append(f"{date_str}-topic-{len(suggestions) + 1}")
+
+    return suggestions[:5]
+
+
+# Filesystem-unsafe characters and whitespace all map to '-', in one
+# C-level table pass instead of two regex scans
+_SANITIZE = str.maketrans({c: '-' for c in '<>:"/\\|?* \t\n\r'})
 
 
 def sanitize_filename(name: str) -> str:
     """Sanitize filename to be filesystem-safe."""
-    # Remove or replace invalid characters
-    name = re.sub(r'[<>:"/\\|?*]', '-', name)
-    name = re.sub(r'\s+', '-', name)  # Replace spaces with hyphens
-    name = name.strip('.-')  # Remove leading/trailing dots and hyphens
-    return name
+    return name.translate(_SANITIZE).strip('.-')
 
 
 def interactive_rename(srt_path: Path, suggestions: list[str]) -> str:
@@ -301,7 +262,11 @@ def interactive_rename(srt_path: Path, suggestions: list[str]) -> str:
     print(f"\n  0. Enter custom filename")
     print(f"  q. Quit without renaming")
     print("="*60)
-    
+
+    # Computed once, not on every invalid retry; also guards against
+    # an LLM suggestion that came back without the date prefix
+    date_prefix = suggestions[0].split('-', 1)[0] if suggestions else datetime.now().strftime('%Y%m%d')
+
     while True:
         choice = input("\nSelect an option (1-5, 0, or q): ").strip().lower()
         
@@ -313,8 +278,7 @@ def interactive_rename(srt_path: Path, suggestions: list[str]) -> str:
             custom_name = input(f"Enter custom filename (without .srt extension): ").strip()
             if custom_name:
                 # Ensure it starts with date
-                if not custom_name.startswith(suggestions[0].split('-')[0]):
-                    date_prefix = suggestions[0].split('-')[0]
+                if not custom_name.startswith(date_prefix):
                     custom_name = f"{date_prefix}-{custom_name}"
                 custom_name = sanitize_filename(custom_name)
                 return f"{custom_name}.srt"
@@ -332,39 +296,20 @@ def interactive_rename(srt_path: Path, suggestions: list[str]) -> str:
             print("Invalid input. Please enter a number, 0, or q.")
 
 
-def main():
-    if len(sys.argv) != 2:
-        print("Usage: python srt_rename.py path/to/file.srt")
-        sys.exit(1)
-
-    srt_path = Path(sys.argv[1])
-
-    if not srt_path.exists() or srt_path.suffix.lower() != ".srt":
-        print("Error: input must be an existing .srt file")
-        sys.exit(1)
+def rename_file(srt_path: Path, auto: bool = False) -> bool:
+    """Suggest and apply a new name for one SRT file.
 
+    Returns True if the file was renamed. The warm LLM client is reused
+    across calls, so batch runs only pay connection setup once.
+    """
     print(f"📄 Reading: {srt_path}")
-    
-    # Check if LM Studio API is available
-    print("🔍 Checking if LM Studio API is available...")
-    if not check_api_available():
-        print(f"\n❌ Error: LM Studio API is not available at {LM_STUDIO_BASE_URL}")
-        print("\n💡 Reminder:")
-        print("   Please make sure LM Studio is running and the model is loaded.")
-        print(f"   The API should be accessible at: {LM_STUDIO_BASE_URL}")
-        print(f"\n   Steps to fix:")
-        print(f"   1. Open LM Studio")
-        print(f"   2. Load the model: {MODEL_NAME}")
-        print(f"   3. Start the local server (check the port matches: {LM_STUDIO_BASE_URL})")
-        print(f"   4. Run this script again")
-        sys.exit(1)
 
     # Read SRT content
     text = read_srt_text(srt_path)
-    
+
     if not text.strip():
         print("⚠️  Warning: No text found in SRT file")
-        sys.exit(1)
+        return False
 
     # Get date for filename
     date_str = get_file_date(srt_path)
@@ -372,45 +317,97 @@ def main():
 
     # Get filename suggestions from LLM
     print("🧠 Generating filename suggestions...")
-    try:
-        suggestions = suggest_filenames(text, date_str)
-    except KeyboardInterrupt:
-        print("\n⚠️  Interrupted by user")
-        sys.exit(1)
-    except Exception as e:
-        print(f"\n❌ Error generating suggestions: {e}")
-        print("\n💡 Reminder:")
-        print("   If the API connection failed, please check:")
-        print("   1. LM Studio is running")
-        print(f"   2. The model ({MODEL_NAME}) is loaded and server is started")
-        print(f"   3. The API is accessible at: {LM_STUDIO_BASE_URL}")
-        sys.exit(1)
+    suggestions = suggest_filenames(text, date_str)
 
-    # Interactive selection
-    new_filename = interactive_rename(srt_path, suggestions)
-    
-    if new_filename is None:
-        sys.exit(0)
+    if auto:
+        # Non-interactive: take the first suggestion
+        new_filename = f"{suggestions[0]}.srt"
+        print(f"🤖 Auto-selecting: {new_filename}")
+    else:
+        new_filename = interactive_rename(srt_path, suggestions)
+        if new_filename is None:
+            return False
 
     # Rename the file
     new_path = srt_path.parent / new_filename
-    
+
     if new_path.exists():
+        if auto:
+            print(f"⚠️  Skipping: {new_filename} already exists")
+            return False
         print(f"\n⚠️  Warning: {new_filename} already exists!")
         overwrite = input("Overwrite? (y/N): ").strip().lower()
         if overwrite != 'y':
             print("Cancelled. File not renamed.")
-            sys.exit(0)
-    
-    try:
-        srt_path.rename(new_path)
-        print(f"\n✅ File renamed successfully!")
-        print(f"   Old: {srt_path.name}")
-        print(f"   New: {new_filename}")
-    except Exception as e:
-        print(f"\n❌ Error renaming file: {e}")
+            return False
+
+    srt_path.rename(new_path)
+    print(f"\n✅ File renamed successfully!")
+    print(f"   Old: {srt_path.name}")
+    print(f"   New: {new_filename}")
+    return True
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg != '--auto']
+    auto = '--auto' in sys.argv[1:]
+
+    if len(args) != 1:
+        print("Usage: python srt_rename.py path/to/file.srt")
+        print("       python srt_rename.py path/to/directory [--auto]")
+        print("\nWith a directory, every *.srt inside is processed with one warm")
+        print("LLM connection; --auto picks the first suggestion without prompting.")
+        sys.exit(1)
+
+    input_path = Path(args[0])
+
+    if input_path.is_dir():
+        srt_paths = sorted(input_path.glob('*.srt'))
+        if not srt_paths:
+            print(f"No .srt files found in {input_path}")
+            sys.exit(1)
+    elif input_path.exists() and input_path.suffix.lower() == ".srt":
+        srt_paths = [input_path]
+    else:
+        print("Error: input must be an existing .srt file or a directory")
+        sys.exit(1)
+
+    # Check if LM Studio API is available
+    print("🔍 Checking if LM Studio API is available...")
+    if not check_api_available():
+        print(f"\n❌ Error: LM Studio API is not available at {LM_STUDIO_BASE_URL}")
+        print("\n💡 Reminder:")
+        print("   Please make sure LM Studio is running and the model is loaded.")
+        print(f"   The API should be accessible at: {LM_STUDIO_BASE_URL}")
+        print(f"\n   Steps to fix:")
+        print(f"   1. Open LM Studio")
+        print(f"   2. Load the model: {MODEL_NAME}")
+        print(f"   3. Start the local server (check the port matches: {LM_STUDIO_BASE_URL})")
+        print(f"   4. Run this script again")
         sys.exit(1)
 
+    renamed = 0
+    for i, srt_path in enumerate(srt_paths, 1):
+        if len(srt_paths) > 1:
+            print(f"\n[{i}/{len(srt_paths)}] {srt_path.name}")
+        try:
+            if rename_file(srt_path, auto=auto):
+                renamed += 1
+        except KeyboardInterrupt:
+            print("\n⚠️  Interrupted by user")
+            sys.exit(1)
+        except Exception as e:
+            print(f"\n❌ Error generating suggestions: {e}")
+            print("\n💡 Reminder:")
+            print("   If the API connection failed, please check:")
+            print("   1. LM Studio is running")
+            print(f"   2. The model ({MODEL_NAME}) is loaded and server is started")
+            print(f"   3. The API is accessible at: {LM_STUDIO_BASE_URL}")
+            sys.exit(1)
+
+    if len(srt_paths) > 1:
+        print(f"\n✅ Renamed {renamed}/{len(srt_paths)} file(s)")
+
 
 if __name__ == "__main__":
     main()
@@ -8,26 +8,22 @@ Output:
 """
 
 import sys
-import os
-import atexit
+import asyncio
+import functools
+import mmap
+import re
 from pathlib import Path
-import pysrt
-from openai import OpenAI
+from openai import AsyncOpenAI
 import httpx
 
 # ---------------- CONFIG ----------------
 MODEL_NAME = "openai/gpt-oss-20b"
 LM_STUDIO_BASE_URL = "http://127.0.0.1:1234/v1"
 TEMPERATURE = 0.3
-MAX_CHARS = 12000   # safety limit for very large SRTs (legacy, kept for compatibility)
 MAX_CHARS_SAFE = 8000   # Safe character limit to avoid hitting token limits
-TEMP_FILE_PREFIX = "._temp_"  # Prefix for temporary files
-MAX_DEPTH = 5  # Maximum recursion depth (default: 3 levels)
+MAX_REDUCE_ROUNDS = 3  # Maximum reduce passes over the combined summaries
 # ---------------------------------------
 
-# Global list to track temporary files for cleanup
-_temp_files = []
-
 
 # Custom exceptions
 class TokenLimitExceeded(Exception):
@@ -36,409 +32,226 @@ class TokenLimitExceeded(Exception):
 
 
 class MaxDepthExceeded(Exception):
-    """Raised when maximum recursion depth is reached."""
+    """Raised when the reduce phase cannot shrink the transcript enough."""
     pass
 
 
+# Cue blocks are separated by a blank line
+_SRT_BLOCK_RE = re.compile(r'\r?\n\r?\n')
+
+
 def read_srt_text(srt_path: Path, max_chars: int = None) -> str:
-    """Read SRT file and extract text content."""
-    if max_chars is None:
-        max_chars = MAX_CHARS
-    
-    subs = pysrt.open(str(srt_path), encoding="utf-8")
+    """Read SRT file and extract text content.
+
+    Splits the raw bytes into cue blocks and drops the index/timestamp
+    lines instead of running pysrt's full parse — only the text is
+    needed here, so allocating a SubRipItem (with parsed index and
+    timestamps) per cue was pure overhead. mmap lets the kernel page
+    the file in without an extra userspace copy.
+
+    max_chars=None reads the full transcript; the map-reduce chunking
+    handles arbitrary size on its own.
+    """
+    # mmap refuses zero-length files, so an empty SRT just yields no text
+    if srt_path.stat().st_size == 0:
+        return ""
+
+    with open(srt_path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        data = m.read().decode('utf-8-sig', 'replace')
 
     lines = []
-    for sub in subs:
-        text = sub.text.replace("\n", " ").strip()
+    total = 0
+    for block in _SRT_BLOCK_RE.split(data):
+        # Drop the index and timestamp lines; join any wrapped text
+        text = " ".join(block.splitlines()[2:]).strip()
         if text:
             lines.append(text)
+            total += len(text) + 1  # +1 for the joining newline
+            if max_chars is not None and total > max_chars:
+                # Already past the truncation point; no need to
+                # parse the rest of the file
+                break
 
     full_text = "\n".join(lines)
 
-    # prevent sending extremely large payloads
-    if len(full_text) > max_chars:
+    # prevent sending extremely large payloads when a limit is given
+    if max_chars is not None and len(full_text) > max_chars:
         full_text = full_text[:max_chars] + "\n\n[TRUNCATED]"
 
     return full_text
 
 
-def split_srt_file(srt_path: Path) -> tuple[Path, Path]:
-    """Split an SRT file into two parts by subtitle count.
-    
-    Returns:
-        tuple[Path, Path]: Paths to the two temporary SRT files
-    """
-    subs = pysrt.open(str(srt_path), encoding="utf-8")
-    subs_list = list(subs)
-    
-    if len(subs_list) < 2:
-        raise ValueError("Cannot split SRT file with less than 2 subtitles")
-    
-    # Split in half (first half gets extra one if odd number)
-    mid_point = (len(subs_list) + 1) // 2
-    first_half = subs_list[:mid_point]
-    second_half = subs_list[mid_point:]
-    
-    # Create temporary file paths
-    base_name = srt_path.stem
-    parent_dir = srt_path.parent
-    temp_file1 = parent_dir / f"{TEMP_FILE_PREFIX}{base_name}_part1.srt"
-    temp_file2 = parent_dir / f"{TEMP_FILE_PREFIX}{base_name}_part2.srt"
-    
-    # Write first half
-    with open(temp_file1, 'w', encoding='utf-8') as f:
-        for i, sub in enumerate(first_half, start=1):
-            f.write(f"{i}\n")
-            f.write(f"{sub.start} --> {sub.end}\n")
-            f.write(f"{sub.text}\n\n")
-    
-    # Write second half
-    with open(temp_file2, 'w', encoding='utf-8') as f:
-        for i, sub in enumerate(second_half, start=1):
-            f.write(f"{i}\n")
-            f.write(f"{sub.start} --> {sub.end}\n")
-            f.write(f"{sub.text}\n\n")
-    
-    # Track temporary files for cleanup
-    _temp_files.append(temp_file1)
-    _temp_files.append(temp_file2)
-    
-    return temp_file1, temp_file2
-
-
-def cleanup_temp_files():
-    """Remove all tracked temporary files."""
-    for temp_file in _temp_files:
-        try:
-            if temp_file.exists():
-                temp_file.unlink()
-        except Exception as e:
-            print(f"⚠️  Warning: Could not delete temporary file {temp_file}: {e}")
+# One client per process: the pooled connection is reused across calls
+# instead of redoing TCP setup each time, and trust_env=False makes
+# httpx ignore HTTP(S)_PROXY etc. entirely, so the localhost LM Studio
+# connection needs no env-var juggling at all.
+@functools.lru_cache(maxsize=1)
+def _get_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(timeout=30.0, trust_env=False)
 
 
-# Register cleanup function to run on exit
-atexit.register(cleanup_temp_files)
+@functools.lru_cache(maxsize=1)
+def _get_client() -> AsyncOpenAI:
+    return AsyncOpenAI(
+        base_url=LM_STUDIO_BASE_URL,
+        api_key="lm-studio",  # dummy key
+        http_client=_get_http_client(),
+    )
 
 
-def check_api_available() -> bool:
-    """Check if LM Studio API is available."""
-    try:
-        # Save original proxy env vars
-        original_http_proxy = os.environ.pop('HTTP_PROXY', None)
-        original_https_proxy = os.environ.pop('HTTPS_PROXY', None)
-        original_all_proxy = os.environ.pop('ALL_PROXY', None)
-        original_no_proxy = os.environ.get('NO_PROXY', '')
-        
-        # Set NO_PROXY to bypass proxy for localhost
-        os.environ['NO_PROXY'] = '127.0.0.1,localhost'
-        # Also clear proxy env vars for httpx
-        os.environ.pop('HTTP_PROXY', None)
-        os.environ.pop('HTTPS_PROXY', None)
-        os.environ.pop('http_proxy', None)
-        os.environ.pop('https_proxy', None)
-        
-        http_client = httpx.Client(timeout=5.0)
-        
-        # Try to connect to the models endpoint
-        response = http_client.get(f"{LM_STUDIO_BASE_URL}/models")
-        http_client.close()
-        
-        # Restore proxy env vars
-        if original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if original_no_proxy:
-            os.environ['NO_PROXY'] = original_no_proxy
-        else:
-            os.environ.pop('NO_PROXY', None)
-        
-        return response.status_code == 200
-    except Exception:
-        # Restore proxy env vars
-        if 'original_http_proxy' in locals() and original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if 'original_https_proxy' in locals() and original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if 'original_all_proxy' in locals() and original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if 'original_no_proxy' in locals():
-            if original_no_proxy:
-                os.environ['NO_PROXY'] = original_no_proxy
-            else:
-                os.environ.pop('NO_PROXY', None)
-        return False
+async def _close_http_client():
+    # Only close a client that was actually created, and do it on the
+    # loop it was created on; closing later from a fresh loop raises
+    # "Event loop is closed"
+    if _get_http_client.cache_info().currsize:
+        await _get_http_client().aclose()
 
 
-def combine_summaries(summary1: str, summary2: str) -> str:
-    """Combine two summaries into one coherent markdown document using LLM."""
-    try:
-        # Save original proxy env vars
-        original_http_proxy = os.environ.pop('HTTP_PROXY', None)
-        original_https_proxy = os.environ.pop('HTTPS_PROXY', None)
-        original_all_proxy = os.environ.pop('ALL_PROXY', None)
-        original_no_proxy = os.environ.get('NO_PROXY', '')
-        
-        # Set NO_PROXY to bypass proxy for localhost
-        os.environ['NO_PROXY'] = '127.0.0.1,localhost'
-        # Also clear proxy env vars for httpx
-        os.environ.pop('HTTP_PROXY', None)
-        os.environ.pop('HTTPS_PROXY', None)
-        os.environ.pop('http_proxy', None)
-        os.environ.pop('https_proxy', None)
-        
-        http_client = httpx.Client(timeout=30.0)
-        
-        client = OpenAI(
-            base_url=LM_STUDIO_BASE_URL,
-            api_key="lm-studio",  # dummy key
-            http_client=http_client
-        )
+# Probe result per base URL, cached for the process lifetime so chained
+# or batched runs pay for the health check once
+_api_alive_cache: dict[str, bool] = {}
+
+
+async def check_api_available() -> bool:
+    """Check if LM Studio API is available (probed once per process)."""
+    if LM_STUDIO_BASE_URL not in _api_alive_cache:
+        try:
+            # trust_env=False on the shared client already bypasses any
+            # proxy env vars for the localhost connection
+            response = await _get_http_client().get(f"{LM_STUDIO_BASE_URL}/models", timeout=5.0)
+            _api_alive_cache[LM_STUDIO_BASE_URL] = response.status_code == 200
+        except Exception:
+            _api_alive_cache[LM_STUDIO_BASE_URL] = False
+    return _api_alive_cache[LM_STUDIO_BASE_URL]
 
-        prompt = f"""
-Combine the following two summary documents into one coherent Markdown document.
+
+async def combine_summaries(summaries: list[str]) -> str:
+    """Combine chunk summaries into one coherent markdown document using LLM."""
+    client = _get_client()
+
+    numbered = "\n\n".join(
+        f"Summary {i}:\n{summary}" for i, summary in enumerate(summaries, 1)
+    )
+    prompt = f"""
+Combine the following {len(summaries)} summary documents into one coherent Markdown document.
 
 Requirements:
-- Merge the two summaries into a single, well-structured document
+- Merge the summaries into a single, well-structured document
 - Start with a clear title (use the most appropriate one or create a new unified title)
 - Use sections with headings
 - Bullet points where appropriate
 - Remove duplicate information
-- Ensure continuity and flow between the two parts
+- Ensure continuity and flow between the parts
 - Maintain focus on key ideas and conclusions
 - Do NOT mention that this comes from multiple parts or that it was combined
 
-First Summary:
-{summary1}
-
-Second Summary:
-{summary2}
+{numbered}
 
 Return the combined summary as a single Markdown document.
 """
 
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
-                {"role": "system", "content": "You are a precise technical summarizer that combines multiple summaries into coherent documents."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=TEMPERATURE,
-            timeout=30.0
-        )
+    response = await client.chat.completions.create(
+        model=MODEL_NAME,
+        messages=[
+            {"role": "system", "content": "You are a precise technical summarizer that combines multiple summaries into coherent documents."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=TEMPERATURE,
+        timeout=30.0
+    )
 
-        result = response.choices[0].message.content.strip()
-        http_client.close()
-        
-        # Restore proxy env vars
-        if original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if original_no_proxy:
-            os.environ['NO_PROXY'] = original_no_proxy
-        else:
-            os.environ.pop('NO_PROXY', None)
-        
-        return result
-    except Exception as e:
-        if 'http_client' in locals():
-            http_client.close()
-        # Restore proxy env vars
-        if 'original_http_proxy' in locals() and original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if 'original_https_proxy' in locals() and original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if 'original_all_proxy' in locals() and original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if 'original_no_proxy' in locals():
-            if original_no_proxy:
-                os.environ['NO_PROXY'] = original_no_proxy
-            else:
-                os.environ.pop('NO_PROXY', None)
-        raise
-
-
-def summarize_recursive(text: str, srt_path: Path, depth: int = 0) -> str:
-    """Recursively summarize text, splitting if too long.
-    
-    Args:
-        text: The text content to summarize
-        srt_path: Path to the original SRT file (for splitting if needed)
-        depth: Current recursion depth
-        
-    Returns:
-        Summarized markdown text
-        
-    Raises:
-        MaxDepthExceeded: If maximum recursion depth is reached
-        TokenLimitExceeded: If text is too long and depth limit reached
+    return response.choices[0].message.content.strip()
+
+
+def chunk_text(text: str, max_chars: int = MAX_CHARS_SAFE) -> list[str]:
+    """Split text into chunks of at most max_chars characters.
+
+    Cuts at the last cue boundary (newline) inside each window so no
+    sentence is cleaved mid-cue; falls back to a hard cut when a window
+    has no newline at all.
+    """
+    chunks = []
+    pos = 0
+    text_len = len(text)
+    while text_len - pos > max_chars:
+        window_end = pos + max_chars
+        cut = text.rfind("\n", pos, window_end)
+        if cut <= pos:
+            cut = window_end
+        chunks.append(text[pos:cut])
+        pos = cut
+    chunks.append(text[pos:])
+    return chunks
+
+
+async def _summarize_with_split(chunk: str, max_chars: int = MAX_CHARS_SAFE) -> str:
+    """Summarize one chunk, force-splitting when it blows the token limit.
+
+    A chunk under the character budget can still exceed the model's
+    token budget — CJK text runs close to one token per character — so
+    halve the window, summarize the pieces concurrently, and join them.
     """
-    # Check depth limit
-    if depth >= MAX_DEPTH:
-        raise MaxDepthExceeded(
-            f"Maximum recursion depth ({MAX_DEPTH}) reached. "
-            f"The SRT file is too long even after {MAX_DEPTH} levels of splitting. "
-            f"Please manually split the file or increase MAX_DEPTH."
-        )
-    
-    # Check if text is too long
-    should_split = len(text) > MAX_CHARS_SAFE
-    
-    if should_split:
-        print(f"📊 Text too long ({len(text)} chars), splitting into 2 parts (depth {depth + 1}/{MAX_DEPTH})...")
-        
-        # Split the SRT file
-        try:
-            temp_file1, temp_file2 = split_srt_file(srt_path)
-            print(f"   ✓ Split into: {temp_file1.name} and {temp_file2.name}")
-        except Exception as e:
-            raise RuntimeError(f"Failed to split SRT file: {e}")
-        
-        # Read text from split files
-        try:
-            text1 = read_srt_text(temp_file1, max_chars=None)  # Read full content
-            text2 = read_srt_text(temp_file2, max_chars=None)
-        except Exception as e:
-            raise RuntimeError(f"Failed to read split SRT files: {e}")
-        
-        # Recursively summarize each part
-        print(f"   🧠 Processing part 1/2 (depth {depth + 1}/{MAX_DEPTH})...")
-        try:
-            summary1 = summarize_recursive(text1, temp_file1, depth + 1)
-        except Exception as e:
-            # Clean up temp files before re-raising
-            cleanup_temp_files()
-            raise
-        
-        print(f"   🧠 Processing part 2/2 (depth {depth + 1}/{MAX_DEPTH})...")
-        try:
-            summary2 = summarize_recursive(text2, temp_file2, depth + 1)
-        except Exception as e:
-            # Clean up temp files before re-raising
-            cleanup_temp_files()
-            raise
-        
-        # Combine the summaries
-        print(f"   🔗 Combining summaries (depth {depth + 1}/{MAX_DEPTH})...")
-        try:
-            combined = combine_summaries(summary1, summary2)
-        except Exception as e:
-            cleanup_temp_files()
-            raise RuntimeError(f"Failed to combine summaries: {e}")
-        
-        # Clean up temporary SRT files (but keep summaries if they were saved)
-        try:
-            if temp_file1.exists():
-                temp_file1.unlink()
-            if temp_file2.exists():
-                temp_file2.unlink()
-            # Remove from tracking list
-            if temp_file1 in _temp_files:
-                _temp_files.remove(temp_file1)
-            if temp_file2 in _temp_files:
-                _temp_files.remove(temp_file2)
-        except Exception as e:
-            print(f"⚠️  Warning: Could not delete temporary files: {e}")
-        
-        return combined
-    
-    # Text is within safe limit, try to summarize
     try:
-        return summarize(text)
+        return await summarize(chunk)
     except TokenLimitExceeded:
-        # If we hit token limit and haven't reached max depth, force splitting
-        if depth < MAX_DEPTH:
-            print(f"⚠️  Token limit exceeded (text length: {len(text)}), forcing split (depth {depth + 1}/{MAX_DEPTH})...")
-            # Force splitting by going through the splitting path
-            # Split the SRT file
-            try:
-                temp_file1, temp_file2 = split_srt_file(srt_path)
-                print(f"   ✓ Split into: {temp_file1.name} and {temp_file2.name}")
-            except Exception as e:
-                raise RuntimeError(f"Failed to split SRT file: {e}")
-            
-            # Read text from split files
-            try:
-                text1 = read_srt_text(temp_file1, max_chars=None)
-                text2 = read_srt_text(temp_file2, max_chars=None)
-            except Exception as e:
-                raise RuntimeError(f"Failed to read split SRT files: {e}")
-            
-            # Recursively summarize each part
-            print(f"   🧠 Processing part 1/2 (depth {depth + 1}/{MAX_DEPTH})...")
-            try:
-                summary1 = summarize_recursive(text1, temp_file1, depth + 1)
-            except Exception as e:
-                cleanup_temp_files()
-                raise
-            
-            print(f"   🧠 Processing part 2/2 (depth {depth + 1}/{MAX_DEPTH})...")
-            try:
-                summary2 = summarize_recursive(text2, temp_file2, depth + 1)
-            except Exception as e:
-                cleanup_temp_files()
-                raise
-            
-            # Combine the summaries
-            print(f"   🔗 Combining summaries (depth {depth + 1}/{MAX_DEPTH})...")
-            try:
-                combined = combine_summaries(summary1, summary2)
-            except Exception as e:
-                cleanup_temp_files()
-                raise RuntimeError(f"Failed to combine summaries: {e}")
-            
-            # Clean up temporary SRT files
+        # Halve relative to what the chunk actually holds, so chunks
+        # already below max_chars still split into at least two pieces
+        halved = min(max_chars, len(chunk)) // 2
+        pieces = chunk_text(chunk, halved)
+        if len(pieces) < 2 or halved < 500:
+            raise
+        print(f"   ⚠️  Chunk over the token limit; re-splitting at {halved} chars...")
+        summaries = await asyncio.gather(*(_summarize_with_split(p, halved) for p in pieces))
+        return "\n\n".join(summaries)
+
+
+async def summarize_document(text: str) -> str:
+    """Summarize a transcript with one map and one reduce round.
+
+    Maps all chunks through summarize() concurrently, then combines the
+    chunk summaries in a single call — two LLM rounds regardless of
+    transcript length, instead of the old halving recursion's log(N)
+    sequential split/combine cascade through temp SRT files on disk.
+    If the combined summaries are still over budget, the same map step
+    is repeated on them (bounded by MAX_REDUCE_ROUNDS).
+    """
+    chunks = chunk_text(text)
+
+    for round_num in range(MAX_REDUCE_ROUNDS):
+        if len(chunks) == 1:
             try:
-                if temp_file1.exists():
-                    temp_file1.unlink()
-                if temp_file2.exists():
-                    temp_file2.unlink()
-                if temp_file1 in _temp_files:
-                    _temp_files.remove(temp_file1)
-                if temp_file2 in _temp_files:
-                    _temp_files.remove(temp_file2)
-            except Exception as e:
-                print(f"⚠️  Warning: Could not delete temporary files: {e}")
-            
-            return combined
-        else:
-            raise MaxDepthExceeded(
-                f"Maximum recursion depth ({MAX_DEPTH}) reached. "
-                f"The text segment is still too long. Please manually split the file or increase MAX_DEPTH."
-            )
-
-
-def generate_tags(summary: str) -> list[str]:
+                return await summarize(chunks[0])
+            except TokenLimitExceeded:
+                # Fits the char budget but not the token budget (CJK);
+                # force-split and fall through to the map-reduce path
+                print(f"   ⚠️  Transcript over the token limit; force-splitting...")
+                chunks = chunk_text(chunks[0], MAX_CHARS_SAFE // 2)
+                if len(chunks) == 1:
+                    raise
+                continue
+
+        print(f"📊 Summarizing {len(chunks)} chunk(s) concurrently (round {round_num + 1}/{MAX_REDUCE_ROUNDS})...")
+        summaries = await asyncio.gather(*(_summarize_with_split(chunk) for chunk in chunks))
+
+        combined = "\n\n".join(summaries)
+        if len(combined) <= MAX_CHARS_SAFE:
+            print(f"   🔗 Combining {len(summaries)} summaries...")
+            return await combine_summaries(summaries)
+
+        # Summaries themselves are over budget; map-reduce them again
+        chunks = chunk_text(combined)
+
+    raise MaxDepthExceeded(
+        f"Could not reduce the transcript below {MAX_CHARS_SAFE} chars "
+        f"in {MAX_REDUCE_ROUNDS} rounds. Please manually split the file "
+        f"or increase MAX_REDUCE_ROUNDS."
+    )
+
+
+async def generate_tags(summary: str) -> list[str]:
     """Generate top 5 relevant tags for a summary using LLM."""
-    try:
-        # Save original proxy env vars
-        original_http_proxy = os.environ.pop('HTTP_PROXY', None)
-        original_https_proxy = os.environ.pop('HTTPS_PROXY', None)
-        original_all_proxy = os.environ.pop('ALL_PROXY', None)
-        original_no_proxy = os.environ.get('NO_PROXY', '')
-        
-        # Set NO_PROXY to bypass proxy for localhost
-        os.environ['NO_PROXY'] = '127.0.0.1,localhost'
-        # Also clear proxy env vars for httpx
-        os.environ.pop('HTTP_PROXY', None)
-        os.environ.pop('HTTPS_PROXY', None)
-        os.environ.pop('http_proxy', None)
-        os.environ.pop('https_proxy', None)
-        
-        http_client = httpx.Client(timeout=30.0)
-        
-        client = OpenAI(
-            base_url=LM_STUDIO_BASE_URL,
-            api_key="lm-studio",  # dummy key
-            http_client=http_client
-        )
-
-        prompt = f"""
+    prompt = f"""
 Analyze the following summary document and generate exactly 5 relevant tags that best describe its main topics and themes.
 
 Requirements:
@@ -456,7 +269,8 @@ Summary:
 Return format example: tag1, tag2, tag3, tag4, tag5
 """
 
-        response = client.chat.completions.create(
+    try:
+        response = await _get_client().chat.completions.create(
             model=MODEL_NAME,
             messages=[
                 {"role": "system", "content": "You are a helpful assistant that generates relevant tags for documents."},
@@ -465,60 +279,30 @@ Return format example: tag1, tag2, tag3, tag4, tag5
             temperature=TEMPERATURE,
             timeout=30.0
         )
-
         result = response.choices[0].message.content.strip()
-        http_client.close()
-        
-        # Restore proxy env vars
-        if original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if original_no_proxy:
-            os.environ['NO_PROXY'] = original_no_proxy
-        else:
-            os.environ.pop('NO_PROXY', None)
-        
-        # Parse tags from response
-        tags = [tag.strip() for tag in result.split(',')]
-        tags = [tag for tag in tags if tag]  # Remove empty tags
-        
-        # Ensure we have exactly 5 tags (pad or trim if needed)
-        if len(tags) > 5:
-            tags = tags[:5]
-        elif len(tags) < 5:
-            # If we have fewer than 5, try to extract more from the summary
-            # For now, just pad with generic tags if needed
-            while len(tags) < 5:
-                tags.append("general")
-        
-        return tags[:5]
-        
     except Exception as e:
-        if 'http_client' in locals():
-            http_client.close()
-        # Restore proxy env vars
-        if 'original_http_proxy' in locals() and original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if 'original_https_proxy' in locals() and original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if 'original_all_proxy' in locals() and original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if 'original_no_proxy' in locals():
-            if original_no_proxy:
-                os.environ['NO_PROXY'] = original_no_proxy
-            else:
-                os.environ.pop('NO_PROXY', None)
         # Return default tags if generation fails
         print(f"⚠️  Warning: Could not generate tags: {e}")
         return ["general", "summary", "document", "content", "notes"]
 
+    # Parse tags from response
+    tags = [tag.strip() for tag in result.split(',')]
+    tags = [tag for tag in tags if tag]  # Remove empty tags
+
+    # Ensure we have exactly 5 tags (pad or trim if needed)
+    if len(tags) > 5:
+        tags = tags[:5]
+    elif len(tags) < 5:
+        # If we have fewer than 5, just pad with generic tags
+        while len(tags) < 5:
+            tags.append("general")
+
+    return tags[:5]
+
 
 def format_summary_with_tags(summary: str, tags: list[str]) -> str:
     """Format summary with frontmatter tags.
-    
+
     Format:
     ---
     tag: tag1, tag2, tag3, tag4, tag5
@@ -527,7 +311,7 @@ def format_summary_with_tags(summary: str, tags: list[str]) -> str:
     <main body>
     """
     tags_str = ", ".join(tags)
-    
+
     # Check if summary already has frontmatter
     if summary.strip().startswith('---'):
         # Extract existing frontmatter and content
@@ -551,38 +335,16 @@ def format_summary_with_tags(summary: str, tags: list[str]) -> str:
             else:
                 # Add tag to existing frontmatter
                 return f"---\n{existing_frontmatter}\ntag: {tags_str}\n---\n\n{content}"
-    
+
     # No frontmatter, add it before the content
     frontmatter = f"---\ntag: {tags_str}\n---\n\n"
     return frontmatter + summary
 
 
-def summarize(text: str) -> str:
-    try:
-        # Create HTTP client that bypasses proxy for localhost
-        # Save original proxy env vars
-        original_http_proxy = os.environ.pop('HTTP_PROXY', None)
-        original_https_proxy = os.environ.pop('HTTPS_PROXY', None)
-        original_all_proxy = os.environ.pop('ALL_PROXY', None)
-        original_no_proxy = os.environ.get('NO_PROXY', '')
-        
-        # Set NO_PROXY to bypass proxy for localhost
-        os.environ['NO_PROXY'] = '127.0.0.1,localhost'
-        # Also clear proxy env vars for httpx
-        os.environ.pop('HTTP_PROXY', None)
-        os.environ.pop('HTTPS_PROXY', None)
-        os.environ.pop('http_proxy', None)
-        os.environ.pop('https_proxy', None)
-        
-        http_client = httpx.Client(timeout=30.0)
-        
-        client = OpenAI(
-            base_url=LM_STUDIO_BASE_URL,
-            api_key="lm-studio",  # dummy key
-            http_client=http_client
-        )
+async def summarize(text: str) -> str:
+    client = _get_client()
 
-        prompt = f"""
+    prompt = f"""
 Summarize the following transcript into a clean Markdown document.
 
 Requirements:
@@ -597,55 +359,37 @@ Transcript:
 {text}
 """
 
-        response = client.chat.completions.create(
+    try:
+        # Stream the completion: tokens arrive as the model generates
+        # instead of buffering server-side until the whole summary is
+        # done, so transfer overlaps generation and only the deltas
+        # are held beyond the growing result.
+        stream = await client.chat.completions.create(
             model=MODEL_NAME,
             messages=[
                 {"role": "system", "content": "You are a precise technical summarizer."},
                 {"role": "user", "content": prompt}
             ],
             temperature=TEMPERATURE,
-            timeout=30.0
+            timeout=30.0,
+            stream=True
         )
-
-        result = response.choices[0].message.content.strip()
-        http_client.close()
-        # Restore proxy env vars
-        if original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if original_no_proxy:
-            os.environ['NO_PROXY'] = original_no_proxy
-        else:
-            os.environ.pop('NO_PROXY', None)
-        return result
+        parts = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
     except Exception as e:
-        if 'http_client' in locals():
-            http_client.close()
-        # Restore proxy env vars
-        if 'original_http_proxy' in locals() and original_http_proxy:
-            os.environ['HTTP_PROXY'] = original_http_proxy
-        if 'original_https_proxy' in locals() and original_https_proxy:
-            os.environ['HTTPS_PROXY'] = original_https_proxy
-        if 'original_all_proxy' in locals() and original_all_proxy:
-            os.environ['ALL_PROXY'] = original_all_proxy
-        if 'original_no_proxy' in locals():
-            if original_no_proxy:
-                os.environ['NO_PROXY'] = original_no_proxy
-            else:
-                os.environ.pop('NO_PROXY', None)
-        
         # Check if this is a token limit error
         error_str = str(e).lower()
         if '400' in error_str or 'token' in error_str or 'context length' in error_str or 'context_length' in error_str:
             raise TokenLimitExceeded(f"Text exceeds LLM token limit: {e}")
-        
+
         raise  # Re-raise other exceptions
 
+    return "".join(parts).strip()
 
-def main():
+
+async def _main_async():
     if len(sys.argv) != 2:
         print("Usage: python srt_to_summary.py path/to/file.srt")
         sys.exit(1)
@@ -657,15 +401,15 @@ def main():
         sys.exit(1)
 
     print(f"📄 Reading: {srt_path}")
-    text = read_srt_text(srt_path, max_chars=None)  # Read full content for recursive processing
-    
+    text = read_srt_text(srt_path, max_chars=None)  # Read full content for chunked processing
+
     if not text.strip():
         print("⚠️  Warning: No text found in SRT file")
         sys.exit(1)
 
     # Check if LM Studio API is available
     print("🔍 Checking if LM Studio API is available...")
-    if not check_api_available():
+    if not await check_api_available():
         print(f"\n❌ Error: LM Studio API is not available at {LM_STUDIO_BASE_URL}")
         print("\n💡 Reminder:")
         print("   Please make sure LM Studio is running and the model is loaded.")
@@ -679,25 +423,22 @@ def main():
 
     print("🧠 Summarizing with openai/gpt-oss-20b...")
     try:
-        summary_md = summarize_recursive(text, srt_path)
+        summary_md = await summarize_document(text)
     except KeyboardInterrupt:
         print("\n⚠️  Interrupted by user")
-        cleanup_temp_files()
         sys.exit(1)
     except MaxDepthExceeded as e:
         print(f"\n❌ Error: {e}")
         print("\n💡 Suggestion:")
         print("   The SRT file is extremely long. Consider:")
         print("   1. Manually splitting the file into smaller parts")
-        print("   2. Increasing MAX_DEPTH in the script (if your system can handle it)")
+        print("   2. Increasing MAX_REDUCE_ROUNDS in the script (if your system can handle it)")
         print("   3. Using a model with a larger context window")
-        cleanup_temp_files()
         sys.exit(1)
     except TokenLimitExceeded as e:
         print(f"\n❌ Error: {e}")
-        print("\n💡 This should not happen - the recursive splitting should handle this.")
+        print("\n💡 This should not happen - the map-reduce chunking should handle this.")
         print("   Please report this issue.")
-        cleanup_temp_files()
         sys.exit(1)
     except Exception as e:
         print(f"\n❌ Error during summarization: {e}")
@@ -706,28 +447,35 @@ def main():
         print("   1. LM Studio is running")
         print(f"   2. The model ({MODEL_NAME}) is loaded and server is started")
         print(f"   3. The API is accessible at: {LM_STUDIO_BASE_URL}")
-        cleanup_temp_files()
         sys.exit(1)
 
     # Generate tags for the summary
     print("🏷️  Generating tags...")
     try:
-        tags = generate_tags(summary_md)
+        tags = await generate_tags(summary_md)
         print(f"   ✓ Generated tags: {', '.join(tags)}")
     except Exception as e:
         print(f"⚠️  Warning: Could not generate tags: {e}")
         tags = ["general", "summary", "document", "content", "notes"]
-    
+
     # Format summary with tags
     formatted_summary = format_summary_with_tags(summary_md, tags)
-    
+
     output_path = srt_path.with_suffix(".summary.md")
     output_path.write_text(formatted_summary, encoding="utf-8")
 
     print(f"✅ Summary written to: {output_path}")
-    
-    # Final cleanup
-    cleanup_temp_files()
+
+
+async def main_async():
+    try:
+        await _main_async()
+    finally:
+        await _close_http_client()
+
+
+def main():
+    asyncio.run(main_async())
 
 
 if __name__ == "__main__":
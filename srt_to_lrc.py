@@ -2,32 +2,55 @@
 import os
 import argparse
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 import re
 
+# One cue block: sequence number, start timestamp, then the text up to
+# the next blank line. finditer runs the whole scan in C instead of a
+# Python-level line loop.
+_SRT_BLOCK_RE = re.compile(
+    r'(?ms)^\d+\s*\n(\d\d:\d\d:\d\d,\d{3})\s*-->\s*\S+\s*\n(.*?)(?=\n\s*\n|\Z)'
+)
+
+# Everything in the LRC header after the [ti:...] line is fixed, so
+# build it once instead of per output file
+_LRC_HEADER_TAIL = "[ar:]\n[al:]\n[by:Whisper STT]\n[offset:0]\n\n"
+
+# Pure string-to-string conversion, so repeated timestamps (common when
+# converting many related files in one run) hit the cache instead of
+# re-parsing
+@lru_cache(maxsize=8192)
 def srt_timestamp_to_lrc(srt_time):
     """
     Convert SRT timestamp (HH:MM:SS,mmm) to LRC format ([MM:SS.xx]).
-    
+
     Args:
         srt_time (str): Timestamp in SRT format (e.g., "00:01:23,456")
-    
+
     Returns:
         str: Timestamp in LRC format (e.g., "[01:23.45]")
     """
-    # Parse SRT timestamp: HH:MM:SS,mmm
-    match = re.match(r'(\d{2}):(\d{2}):(\d{2}),(\d{3})', srt_time.strip())
-    if not match:
+    # SRT timestamps have a fixed HH:MM:SS,mmm shape, so fixed-offset
+    # slicing beats a regex here: no pattern traversal, no match object,
+    # just four int() calls per timestamp.
+    s = srt_time.strip()
+    if len(s) != 12 or s[2] != ':' or s[5] != ':' or s[8] != ',':
         raise ValueError(f"Invalid SRT timestamp format: {srt_time}")
-    
-    hours, minutes, seconds, milliseconds = match.groups()
-    
-    # Convert to total minutes and seconds
-    total_minutes = int(hours) * 60 + int(minutes)
-    total_seconds = int(seconds)
-    centiseconds = int(milliseconds) // 10  # Convert milliseconds to centiseconds
-    
+    try:
+        hours = int(s[0:2])
+        minutes = int(s[3:5])
+        seconds = int(s[6:8])
+        milliseconds = int(s[9:12])
+    except ValueError:
+        raise ValueError(f"Invalid SRT timestamp format: {srt_time}")
+
+    # Convert to total minutes, keep seconds and centiseconds
+    total_minutes = hours * 60 + minutes
+    centiseconds = milliseconds // 10
+
     # Format as LRC: [MM:SS.xx]
-    return f"[{total_minutes:02d}:{total_seconds:02d}.{centiseconds:02d}]"
+    return f"[{total_minutes:02d}:{seconds:02d}.{centiseconds:02d}]"
 
 def srt_to_lrc(srt_file, lrc_file=None, output_dir=None):
     """
@@ -41,14 +64,16 @@ def srt_to_lrc(srt_file, lrc_file=None, output_dir=None):
     # Verify SRT file exists
     if not os.path.exists(srt_file):
         raise FileNotFoundError(f"Input file {srt_file} not found")
-    
+
+    # Build the Path once and reuse it for suffix/stem/output checks
+    srt_path = Path(srt_file)
+
     # Validate file extension
-    if Path(srt_file).suffix.lower() != '.srt':
+    if srt_path.suffix.lower() != '.srt':
         raise ValueError("Input file must have .srt extension")
-    
+
     # Set output file path if not provided
     if lrc_file is None:
-        srt_path = Path(srt_file)
         if output_dir:
             # Create output directory if it doesn't exist
             output_path = Path(output_dir)
@@ -60,57 +85,27 @@ def srt_to_lrc(srt_file, lrc_file=None, output_dir=None):
     print(f"Processing {srt_file}...")
     lrc_lines = []
     
-    # Read SRT file
-    with open(srt_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            # Look for sequence number
-            if line.isdigit():
-                i += 1
-                # Look for timestamp line
-                if i < len(lines) and '-->' in lines[i]:
-                    timestamp_line = lines[i].strip()
-                    # Extract start timestamp (before -->)
-                    start_time = timestamp_line.split('-->')[0].strip()
-                    
-                    i += 1
-                    # Collect subtitle text until empty line or end
-                    subtitle_text = []
-                    while i < len(lines) and lines[i].strip():
-                        subtitle_text.append(lines[i].strip())
-                        i += 1
-                    
-                    if subtitle_text:
-                        # Convert timestamp and format as LRC
-                        try:
-                            lrc_timestamp = srt_timestamp_to_lrc(start_time)
-                            text = ' '.join(subtitle_text)
-                            lrc_lines.append(f"{lrc_timestamp}{text}")
-                        except ValueError as e:
-                            print(f"Warning: {e}")
-                else:
-                    i += 1
-            else:
-                i += 1
+    # Read SRT file and scan cue blocks with one compiled regex; raw
+    # bytes plus one decode skips TextIOWrapper's incremental codec
+    text = srt_path.read_bytes().decode('utf-8')
+    for m in _SRT_BLOCK_RE.finditer(text):
+        subtitle_text = ' '.join(m.group(2).split())
+        if subtitle_text:
+            # Convert timestamp and format as LRC
+            try:
+                lrc_timestamp = srt_timestamp_to_lrc(m.group(1))
+                lrc_lines.append(f"{lrc_timestamp}{subtitle_text}")
+            except ValueError as e:
+                print(f"Warning: {e}")
     
     # Extract filename without extension for title
-    file_stem = Path(srt_file).stem
+    file_stem = srt_path.stem
     
-    # Write to LRC file with metadata headers
-    with open(lrc_file, 'w', encoding='utf-8') as f:
-        # Write LRC metadata headers
-        f.write(f"[ti:{file_stem}]\n")
-        f.write("[ar:]\n")
-        f.write("[al:]\n")
-        f.write("[by:Whisper STT]\n")
-        f.write("[offset:0]\n")
-        f.write("\n")
-        
-        # Write lyrics with timestamps
-        for line in lrc_lines:
-            f.write(f"{line}\n")
+    # Build the whole file in memory, then write it in one call instead
+    # of one f.write per line
+    out = [f"[ti:{file_stem}]\n", _LRC_HEADER_TAIL]
+    out.extend(f"{line}\n" for line in lrc_lines)
+    Path(lrc_file).write_bytes(''.join(out).encode('utf-8'))
     
     print(f"LRC file saved to {lrc_file}")
 
@@ -142,13 +137,28 @@ def process_path(path):
         
         print(f"Found {len(srt_files)} SRT file(s) to process")
         print(f"Output directory: {output_dir}\n")
-        
-        for srt_file in srt_files:
-            try:
-                srt_to_lrc(str(srt_file), output_dir=str(output_dir))
-            except Exception as e:
-                print(f"Error processing {srt_file.name}: {e}")
-        
+
+        if len(srt_files) < 2:
+            # Not worth spinning up worker processes for one file
+            for srt_file in srt_files:
+                try:
+                    srt_to_lrc(str(srt_file), output_dir=str(output_dir))
+                except Exception as e:
+                    print(f"Error processing {srt_file.name}: {e}")
+        else:
+            # Conversion is CPU-bound string work with no shared state,
+            # so it scales across cores in a process pool
+            with ProcessPoolExecutor() as executor:
+                futures = {
+                    executor.submit(srt_to_lrc, str(srt_file), None, str(output_dir)): srt_file
+                    for srt_file in srt_files
+                }
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"Error processing {futures[future].name}: {e}")
+
         print(f"\nCompleted processing {len(srt_files)} file(s)")
     else:
         raise ValueError(f"{path} is neither a file nor a directory")
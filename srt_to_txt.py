@@ -2,6 +2,15 @@
 import os
 import argparse
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import re
+
+# One cue block: sequence number, start timestamp, then the text up to
+# the next blank line. finditer runs the whole scan in C instead of a
+# Python-level line loop.
+_SRT_BLOCK_RE = re.compile(
+    r'(?ms)^\d+\s*\n(\d\d:\d\d:\d\d,\d{3})\s*-->\s*\S+\s*\n(.*?)(?=\n\s*\n|\Z)'
+)
 
 def srt_to_text(srt_file, txt_file=None, output_dir=None):
     """
@@ -15,14 +24,16 @@ def srt_to_text(srt_file, txt_file=None, output_dir=None):
     # Verify SRT file exists
     if not os.path.exists(srt_file):
         raise FileNotFoundError(f"Input file {srt_file} not found")
-    
+
+    # Build the Path once and reuse it for suffix/output checks
+    srt_path = Path(srt_file)
+
     # Validate file extension
-    if Path(srt_file).suffix.lower() != '.srt':
+    if srt_path.suffix.lower() != '.srt':
         raise ValueError("Input file must have .srt extension")
-    
+
     # Set output file path if not provided
     if txt_file is None:
-        srt_path = Path(srt_file)
         if output_dir:
             # Create output directory if it doesn't exist
             output_path = Path(output_dir)
@@ -34,34 +45,16 @@ def srt_to_text(srt_file, txt_file=None, output_dir=None):
     print(f"Processing {srt_file}...")
     subtitles = []
     
-    # Read SRT file
-    with open(srt_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            # Skip sequence number
-            if line.isdigit():
-                i += 1
-                # Skip timestamp line
-                if i < len(lines) and '-->' in lines[i]:
-                    i += 1
-                    # Collect subtitle text until empty line or end
-                    subtitle_text = []
-                    while i < len(lines) and lines[i].strip():
-                        subtitle_text.append(lines[i].strip())
-                        i += 1
-                    if subtitle_text:
-                        subtitles.append(' '.join(subtitle_text))
-                else:
-                    i += 1
-            else:
-                i += 1
+    # Read SRT file and scan cue blocks with one compiled regex; raw
+    # bytes plus one decode skips TextIOWrapper's incremental codec
+    text = srt_path.read_bytes().decode('utf-8')
+    for m in _SRT_BLOCK_RE.finditer(text):
+        subtitle_text = ' '.join(m.group(2).split())
+        if subtitle_text:
+            subtitles.append(subtitle_text)
     
-    # Write to text file
-    with open(txt_file, 'w', encoding='utf-8') as f:
-        for subtitle in subtitles:
-            f.write(f"{subtitle}\n")
+    # Write to text file: one join, one encode, one write
+    Path(txt_file).write_bytes(''.join(f"{subtitle}\n" for subtitle in subtitles).encode('utf-8'))
     
     print(f"Subtitles saved to {txt_file}")
 
@@ -93,13 +86,28 @@ def process_path(path):
         
         print(f"Found {len(srt_files)} SRT file(s) to process")
         print(f"Output directory: {output_dir}\n")
-        
-        for srt_file in srt_files:
-            try:
-                srt_to_text(str(srt_file), output_dir=str(output_dir))
-            except Exception as e:
-                print(f"Error processing {srt_file.name}: {e}")
-        
+
+        if len(srt_files) < 2:
+            # Not worth spinning up worker processes for one file
+            for srt_file in srt_files:
+                try:
+                    srt_to_text(str(srt_file), output_dir=str(output_dir))
+                except Exception as e:
+                    print(f"Error processing {srt_file.name}: {e}")
+        else:
+            # Conversion is CPU-bound string work with no shared state,
+            # so it scales across cores in a process pool
+            with ProcessPoolExecutor() as executor:
+                futures = {
+                    executor.submit(srt_to_text, str(srt_file), None, str(output_dir)): srt_file
+                    for srt_file in srt_files
+                }
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"Error processing {futures[future].name}: {e}")
+
         print(f"\nCompleted processing {len(srt_files)} file(s)")
     else:
         raise ValueError(f"{path} is neither a file nor a directory")
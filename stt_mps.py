@@ -1,68 +1,101 @@
 #!/usr/bin/env python3
-import os, sys, argparse, subprocess, time
+import os, sys, argparse, functools, subprocess, time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # -------------------------
 # Utilities
 # -------------------------
+def _srt_timestamp(t):
+    """Format seconds as an SRT timestamp (HH:MM:SS,mmm)."""
+    # Work in integer milliseconds and put the comma in the format
+    # string itself: no float formatting, no second pass to swap
+    # '.' for ','. This also carries a rounded-up second into the
+    # minute correctly instead of printing 60.000.
+    ms = round(t * 1000)
+    s, ms = divmod(ms, 1000)
+    m, s = divmod(s, 60)
+    h, m = divmod(m, 60)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+# Per-segment formatters shared by the batch writers below and the
+# streaming path in transcribe_file, so both produce identical bytes
+def _srt_block(index, seg):
+    text = seg['text'].strip()
+    speaker = seg.get('speaker')
+    line = f"{speaker}: {text}" if speaker else text
+    return f"{index}\n{_srt_timestamp(seg['start'])} --> {_srt_timestamp(seg['end'])}\n{line}\n\n"
+
+def _txt_line(seg):
+    speaker = seg.get('speaker')
+    text = seg['text'].strip()
+    return f"{speaker}: {text}\n" if speaker else f"{text}\n"
+
+# Everything in the LRC header after the [ti:...] line is fixed, so
+# build it once instead of per output file
+_LRC_HEADER_TAIL = "[ar:]\n[al:]\n[by:Whisper STT]\n[offset:0]\n\n"
+
+def _lrc_header(title):
+    return f"[ti:{title}]\n" + _LRC_HEADER_TAIL
+
+def _lrc_line(seg):
+    start_time = seg['start']
+    # Convert to total minutes and seconds
+    total_minutes = int(start_time // 60)
+    total_seconds = int(start_time % 60)
+    # Get centiseconds (hundredths of a second)
+    centiseconds = int((start_time % 1) * 100)
+
+    # Format as LRC: [MM:SS.xx]text
+    speaker = seg.get('speaker')
+    text = seg['text'].strip()
+    line = f"{speaker}: {text}" if speaker else text
+    return f"[{total_minutes:02d}:{total_seconds:02d}.{centiseconds:02d}]{line}\n"
+
 def transcriptions_to_srt(segments, srt_file):
-    with open(srt_file, 'w', encoding='utf-8') as f:
-        for i, seg in enumerate(segments, 1):
-            start = seg['start']; end = seg['end']; text = seg['text'].strip()
-            start_srt = f"{int(start//3600):02d}:{int((start%3600)//60):02d}:{start%60:06.3f}".replace('.', ',')
-            end_srt   = f"{int(end//3600):02d}:{int((end%3600)//60):02d}:{end%60:06.3f}".replace('.', ',')
-            speaker = seg.get('speaker')
-            line = f"{speaker}: {text}" if speaker else text
-            f.write(f"{i}\n{start_srt} --> {end_srt}\n{line}\n\n")
+    # Build everything in memory: one join, one encode, one write —
+    # bytes mode skips the TextIOWrapper codec layer entirely
+    out = ''.join(_srt_block(i, seg) for i, seg in enumerate(segments, 1))
+    Path(srt_file).write_bytes(out.encode('utf-8'))
 
 def transcriptions_to_txt(segments, txt_file):
-    with open(txt_file, 'w', encoding='utf-8') as f:
-        for seg in segments:
-            speaker = seg.get('speaker')
-            text = seg['text'].strip()
-            f.write(f"{speaker}: {text}\n" if speaker else f"{text}\n")
+    out = ''.join(_txt_line(seg) for seg in segments)
+    Path(txt_file).write_bytes(out.encode('utf-8'))
 
 def transcriptions_to_lrc(segments, lrc_file, title=""):
     """
     Generate LRC (lyrics) file from transcription segments.
     """
-    with open(lrc_file, 'w', encoding='utf-8') as f:
-        # Write LRC metadata headers
-        f.write(f"[ti:{title}]\n")
-        f.write("[ar:]\n")
-        f.write("[al:]\n")
-        f.write("[by:Whisper STT]\n")
-        f.write("[offset:0]\n")
-        f.write("\n")
-        
-        # Write lyrics with timestamps
-        for seg in segments:
-            start_time = seg['start']
-            # Convert to total minutes and seconds
-            total_minutes = int(start_time // 60)
-            total_seconds = int(start_time % 60)
-            # Get centiseconds (hundredths of a second)
-            centiseconds = int((start_time % 1) * 100)
-            
-            # Format as LRC: [MM:SS.xx]text
-            speaker = seg.get('speaker')
-            text = seg['text'].strip()
-            line = f"{speaker}: {text}" if speaker else text
-            lrc_timestamp = f"[{total_minutes:02d}:{total_seconds:02d}.{centiseconds:02d}]"
-            f.write(f"{lrc_timestamp}{line}\n")
+    out = _lrc_header(title) + ''.join(_lrc_line(seg) for seg in segments)
+    Path(lrc_file).write_bytes(out.encode('utf-8'))
 
 def find_audio_files(directory, recursive=False):
     supported = {'.wav', '.m4a', '.mp3', '.mp4', '.flac', '.aac', '.ogg'}
-    p = Path(directory); found = []
-    it = p.rglob("*") if recursive else p.glob("*")
-    for item in it:
-        if item.is_file() and item.suffix.lower() in supported:
-            found.append(str(item))
-    return sorted(found)
+    # os.scandir reuses the file type cached from the directory read,
+    # so no extra stat per entry and no Path object per entry (glob
+    # pays both)
+    def _walk(path):
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        yield from _walk(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    if os.path.splitext(entry.name)[1].lower() in supported:
+                        yield entry.path
+    return sorted(_walk(directory))
 
-def convert_to_wav(input_file, wav_path):
-    cmd = ['ffmpeg','-y','-i', input_file,'-ac','1','-ar','16000', wav_path]
-    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+def decode_audio(media_file):
+    """Decode audio to mono 16 kHz float32 samples via an ffmpeg pipe.
+
+    Streams raw PCM straight into memory instead of writing a temp WAV
+    to disk and reading it back; faster-whisper accepts the resulting
+    numpy array directly.
+    """
+    import numpy as np
+    cmd = ['ffmpeg','-v','error','-i', media_file,'-f','f32le','-ac','1','-ar','16000','pipe:1']
+    proc = subprocess.run(cmd, capture_output=True, check=True)
+    return np.frombuffer(proc.stdout, dtype=np.float32)
 
 def to_overlap(a0,a1,b0,b1):
     return max(0.0, min(a1,b1) - max(a0,b0))
@@ -70,6 +103,7 @@ def to_overlap(a0,a1,b0,b1):
 # -------------------------
 # OpenCC optional
 # -------------------------
+@functools.lru_cache(maxsize=None)
 def get_opencc(profile):
     if profile in (None, "", "none"):
         return None
@@ -83,14 +117,26 @@ def get_opencc(profile):
 # -------------------------
 # Diarization optional via WhisperX
 # -------------------------
+# Pipeline cache keyed by (device, token): pyannote weights load from
+# disk on construction, so batch runs should pay that once per process
+_diar_pipes = {}
+
+def _get_diar_pipe(token, device):
+    key = (device, token)
+    pipe = _diar_pipes.get(key)
+    if pipe is None:
+        import whisperx
+        pipe = whisperx.DiarizationPipeline(use_auth_token=token, device=device)
+        _diar_pipes[key] = pipe
+    return pipe
+
 def diarize_segments(audio_path, max_speakers=0, hf_token_env="HF_TOKEN", device="mps"):
     try:
-        import whisperx, os
         token = os.environ.get(hf_token_env, None)
         if not token:
             print("[WARN] HF token not set. Set HF_TOKEN to use --diarize.")
             return None
-        pipe = whisperx.DiarizationPipeline(use_auth_token=token, device=device)
+        pipe = _get_diar_pipe(token, device)
         diar = pipe(audio_path, num_speakers=max_speakers if max_speakers>0 else None)
         # diar is list of dicts: {'start','end','speaker'}
         # Normalize speaker names to Speaker 1..N in order of appearance
@@ -128,7 +174,9 @@ def transcribe_file(
     beam_size=5,
     opencc_profile="none",
     diarize=False,
-    max_speakers=0
+    max_speakers=0,
+    model=None,
+    audio=None
 ):
     start_time = time.time()
     print(f"\n{'='*80}")
@@ -138,52 +186,67 @@ def transcribe_file(
     if not os.path.exists(media_file):
         raise FileNotFoundError(f"Input file {media_file} not found")
 
-    ext = Path(media_file).suffix.lower()
-    valid_audio = {'.wav', '.m4a', '.mp3', '.flac', '.aac', '.ogg'}
-    temp_wav = None
+    # Build the Path once; stem/parent are needed several times below
+    # and each Path(...) call re-splits the string
+    media_path = Path(media_file)
+    base_name = media_path.stem
 
     if output_dir is None:
-        output_dir = Path(media_file).parent
+        output_dir = media_path.parent
     else:
         output_dir = Path(output_dir); output_dir.mkdir(parents=True, exist_ok=True)
     print(f"  Output directory: {output_dir}")
 
     print(f"\n[STEP 2/6] Preparing audio file...")
-    if ext == '.mp4' or ext not in valid_audio:
-        base = Path(media_file).stem
-        temp_wav = str(output_dir / f"{base}_temp.wav")
-        print(f"  Converting {media_file} to WAV...")
-        convert_to_wav(media_file, temp_wav)
-        audio_path = temp_wav
-        print(f"  ✓ Conversion complete")
+    if audio is not None:
+        # Batch mode decodes ahead on a background thread and hands the
+        # PCM in directly
+        audio_path = audio
+        print(f"  ✓ Audio pre-decoded (mono 16 kHz PCM)")
     else:
-        audio_path = media_file
-        print(f"  ✓ Audio file ready (format: {ext})")
+        # Decode everything through the ffmpeg pipe, even plain WAV:
+        # handing faster-whisper a path makes it run its own full
+        # decode/resample pass, so one decode here replaces two
+        print(f"  Decoding {media_file} to mono 16 kHz PCM...")
+        audio_path = decode_audio(media_file)
+        print(f"  ✓ Decoding complete")
 
-    base_name = Path(media_file).stem
     srt_file = str(output_dir / f"{base_name}.srt")
     txt_file = str(output_dir / f"{base_name}.txt")
     lrc_file = str(output_dir / f"{base_name}.lrc")
 
-    # Load model
-    from faster_whisper import WhisperModel
+    # Load model (batch mode passes in an already-loaded one so a
+    # directory of K files pays the load cost once, not K times)
     print(f"\n[STEP 3/6] Loading Whisper model...")
-    print(f"  Model: {model_name}")
-    print(f"  Device: {device}")
-    print(f"  Compute type: {compute_type}")
-    print(f"  This may take a while on first run (downloading model)...")
-    model = WhisperModel(model_name, device=device, compute_type=compute_type)
-    print(f"  ✓ Model loaded successfully")
+    if model is None:
+        from faster_whisper import WhisperModel
+        print(f"  Model: {model_name}")
+        print(f"  Device: {device}")
+        print(f"  Compute type: {compute_type}")
+        print(f"  This may take a while on first run (downloading model)...")
+        model = WhisperModel(model_name, device=device, compute_type=compute_type)
+        print(f"  ✓ Model loaded successfully")
+    else:
+        print(f"  ✓ Reusing already-loaded model")
 
     lang_code = None if language in (None, "", "auto") else language
     cc = get_opencc(opencc_profile)
+    if cc:
+        # Captions repeat short phrases a lot; memoize per-string
+        # conversion so OpenCC only sees each distinct text once
+        import functools
+        @functools.lru_cache(maxsize=4096)
+        def _cc_convert(t):
+            return cc.convert(t)
 
     # Optional diarization
     dia_segments = None
     if diarize:
         print(f"\n[STEP 4/6] Running speaker diarization...")
         print(f"  Max speakers: {max_speakers if max_speakers > 0 else 'auto-detect'}")
-        dia_segments = diarize_segments(audio_path, max_speakers=max_speakers, device=("cuda" if device=="cuda" else "mps"))
+        # whisperx loads and decodes the file itself, so hand it the
+        # original media path rather than the in-memory PCM
+        dia_segments = diarize_segments(media_file, max_speakers=max_speakers, device=("cuda" if device=="cuda" else "mps"))
         if dia_segments:
             print(f"  ✓ Diarization complete ({len(set(d['speaker'] for d in dia_segments))} speakers detected)")
     else:
@@ -204,47 +267,94 @@ def transcribe_file(
         task="transcribe"
     )
 
+    # Without diarization each segment is final as soon as the model
+    # emits it, so stream it straight to the open output files instead
+    # of buffering the whole transcript and walking it again. With
+    # diarization the full list is kept for the speaker pass below.
     segments = []
     segment_count = 0
-    for s in seg_iter:
-        text = s.text
-        if cc: text = cc.convert(text)
-        seg = {"start": s.start, "end": s.end, "text": text}
-        segments.append(seg)
-        segment_count += 1
-        if segment_count % 10 == 0:
-            print(f"  Processing segments... ({segment_count} segments so far)")
-    print(f"  ✓ Transcription complete ({len(segments)} segments)")
-
-    # If diarized, assign speaker with max overlap
+    stream_sinks = None
+    if not dia_segments:
+        # Stream into .part files and publish them with os.replace once
+        # transcription finishes, so a crash mid-run never leaves a
+        # truncated file under a final output name
+        f_txt = f_lrc = None
+        stream_sinks = []
+        f_srt = open(srt_file + '.part', 'w', encoding='utf-8')
+        stream_sinks.append((f_srt, srt_file + '.part', srt_file))
+        if generate_txt:
+            f_txt = open(txt_file + '.part', 'w', encoding='utf-8')
+            stream_sinks.append((f_txt, txt_file + '.part', txt_file))
+        if generate_lrc:
+            f_lrc = open(lrc_file + '.part', 'w', encoding='utf-8')
+            f_lrc.write(_lrc_header(base_name))
+            stream_sinks.append((f_lrc, lrc_file + '.part', lrc_file))
+    try:
+        for s in seg_iter:
+            text = s.text
+            if cc: text = _cc_convert(text)
+            seg = {"start": s.start, "end": s.end, "text": text}
+            segment_count += 1
+            if stream_sinks is not None:
+                f_srt.write(_srt_block(segment_count, seg))
+                if f_txt: f_txt.write(_txt_line(seg))
+                if f_lrc: f_lrc.write(_lrc_line(seg))
+            else:
+                segments.append(seg)
+            if segment_count % 10 == 0:
+                print(f"  Processing segments... ({segment_count} segments so far)")
+    except BaseException:
+        if stream_sinks is not None:
+            for fh, part, _ in stream_sinks:
+                fh.close()
+                try:
+                    os.remove(part)
+                except OSError:
+                    pass
+        raise
+    if stream_sinks is not None:
+        for fh, part, final in stream_sinks:
+            fh.close()
+            os.replace(part, final)
+    print(f"  ✓ Transcription complete ({segment_count} segments)")
+
+    # If diarized, assign speaker with max overlap. Both lists are
+    # time-sorted, so a two-pointer sweep only visits the diarization
+    # turns that can overlap each segment: O(N+M) instead of scanning
+    # every turn for every segment.
     if dia_segments:
         print(f"  Assigning speakers to segments...")
-        labeled = []
+        j = 0
+        n_dia = len(dia_segments)
         for seg in segments:
+            # Drop turns that ended before this segment starts; they
+            # can't overlap anything later either
+            while j < n_dia and dia_segments[j]["end"] < seg["start"]:
+                j += 1
             best_spk, best_ov = None, 0.0
-            for d in dia_segments:
+            k = j
+            while k < n_dia and dia_segments[k]["start"] < seg["end"]:
+                d = dia_segments[k]
                 ov = to_overlap(seg["start"], seg["end"], d["start"], d["end"])
                 if ov > best_ov:
                     best_ov = ov; best_spk = d["speaker"]
+                k += 1
             seg["speaker"] = best_spk or "Speaker ?"
-            labeled.append(seg)
-        segments = labeled
         print(f"  ✓ Speaker labels assigned")
 
     print(f"\n[STEP 6/6] Writing output files...")
-    print(f"  Writing SRT: {srt_file}")
-    transcriptions_to_srt(segments, srt_file)
-    if generate_txt:
-        print(f"  Writing TXT: {txt_file}")
-        transcriptions_to_txt(segments, txt_file)
-    if generate_lrc:
-        print(f"  Writing LRC: {lrc_file}")
-        transcriptions_to_lrc(segments, lrc_file, title=base_name)
-    print(f"  ✓ Output files written")
-
-    if temp_wav and os.path.exists(temp_wav):
-        print(f"  Cleaning up temporary files...")
-        os.remove(temp_wav)
+    if stream_sinks is not None:
+        print(f"  ✓ Output files streamed during transcription")
+    else:
+        print(f"  Writing SRT: {srt_file}")
+        transcriptions_to_srt(segments, srt_file)
+        if generate_txt:
+            print(f"  Writing TXT: {txt_file}")
+            transcriptions_to_txt(segments, txt_file)
+        if generate_lrc:
+            print(f"  Writing LRC: {lrc_file}")
+            transcriptions_to_lrc(segments, lrc_file, title=base_name)
+        print(f"  ✓ Output files written")
 
     elapsed = time.time() - start_time
     print(f"\n{'='*80}")
@@ -308,26 +418,52 @@ def main():
             print("No audio files found.")
             sys.exit(1)
         print(f"Found {len(files)} file(s).")
-        for i, fpath in enumerate(files, 1):
-            print(f"[{i}/{len(files)}] {fpath}")
-            try:
-                transcribe_file(
-                    fpath,
-                    output_dir=args.output,
-                    generate_txt=args.text,
-                    generate_lrc=args.lrc,
-                    model_name=args.model,
-                    device=args.device,
-                    compute_type=args.compute_type,
-                    language=args.language,
-                    vad=not args.no_vad,
-                    beam_size=args.beam_size,
-                    opencc_profile=args.opencc,
-                    diarize=args.diarize,
-                    max_speakers=args.speakers
-                )
-            except Exception as e:
-                print(f"[ERROR] {fpath}: {e}")
+        # Load the model once up front; reloading it per file dominates
+        # batch runtime for short inputs
+        from faster_whisper import WhisperModel
+        print(f"Loading Whisper model ({args.model}) once for the batch...")
+        model = WhisperModel(args.model, device=args.device, compute_type=args.compute_type)
+        # Decode the next file on a background thread while the model is
+        # busy with the current one, so ffmpeg time hides behind the
+        # transcription instead of adding to it
+        with ThreadPoolExecutor(max_workers=1) as decoder:
+            future = decoder.submit(decode_audio, files[0])
+            for i, fpath in enumerate(files, 1):
+                print(f"[{i}/{len(files)}] {fpath}")
+                try:
+                    audio = future.result()
+                except Exception as e:
+                    audio = None
+                    decode_err = e
+                else:
+                    decode_err = None
+                # Kick off the next decode before transcribing, even if
+                # this file failed to decode
+                if i < len(files):
+                    future = decoder.submit(decode_audio, files[i])
+                if decode_err is not None:
+                    print(f"[ERROR] {fpath}: {decode_err}")
+                    continue
+                try:
+                    transcribe_file(
+                        fpath,
+                        output_dir=args.output,
+                        generate_txt=args.text,
+                        generate_lrc=args.lrc,
+                        model_name=args.model,
+                        device=args.device,
+                        compute_type=args.compute_type,
+                        language=args.language,
+                        vad=not args.no_vad,
+                        beam_size=args.beam_size,
+                        opencc_profile=args.opencc,
+                        diarize=args.diarize,
+                        max_speakers=args.speakers,
+                        model=model,
+                        audio=audio
+                    )
+                except Exception as e:
+                    print(f"[ERROR] {fpath}: {e}")
     else:
         print("Invalid path.")
         sys.exit(1)
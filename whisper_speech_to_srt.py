@@ -1,94 +1,122 @@
 #!/usr/local/bin/python3
-import whisper
 import os
 import argparse
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import time
 import sys
 
+# Persistent model cache so fresh environments (and multiple workers
+# sharing a mounted volume) reuse downloaded weights instead of
+# re-fetching them; override with WHISPER_CACHE_DIR
+WHISPER_CACHE = os.environ.get("WHISPER_CACHE_DIR", os.path.expanduser("~/.cache/whisper"))
+
+def _srt_timestamp(t):
+    """Format seconds as an SRT timestamp (HH:MM:SS,mmm)."""
+    # Work in integer milliseconds and put the comma in the format
+    # string itself: no float formatting, no second pass to swap
+    # '.' for ','. This also carries a rounded-up second into the
+    # minute correctly instead of printing 60.000.
+    ms = round(t * 1000)
+    s, ms = divmod(ms, 1000)
+    m, s = divmod(s, 60)
+    h, m = divmod(m, 60)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+def _write_atomic(path, text):
+    """Write text to path via a .part file and an atomic rename.
+
+    A crashed or parallel run can never leave a half-written subtitle
+    file visible under the final name.
+    """
+    part = f"{path}.part"
+    with open(part, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(part, path)
+
+# Per-segment formatters shared by the batch writers below and the
+# streaming path in wav_to_subtitles, so both produce identical bytes
+def _srt_block(index, segment):
+    start_srt = _srt_timestamp(segment['start'])
+    end_srt = _srt_timestamp(segment['end'])
+    return f"{index}\n{start_srt} --> {end_srt}\n{segment['text'].strip()}\n\n"
+
+def _txt_line(segment):
+    return f"{segment['text'].strip()}\n"
+
+def _lrc_header(title):
+    return (
+        f"[ti:{title}]\n"
+        "[ar:]\n"
+        "[al:]\n"
+        "[by:Whisper STT]\n"
+        "[offset:0]\n"
+        "\n"
+    )
+
+def _lrc_line(segment):
+    start_time = segment['start']
+    # Convert to total minutes and seconds
+    total_minutes = int(start_time // 60)
+    total_seconds = int(start_time % 60)
+    # Get centiseconds (hundredths of a second)
+    centiseconds = int((start_time % 1) * 100)
+
+    # Format as LRC: [MM:SS.xx]text
+    return f"[{total_minutes:02d}:{total_seconds:02d}.{centiseconds:02d}]{segment['text'].strip()}\n"
+
 def transcriptions_to_srt(segments, srt_file):
     """
     Generate SRT file from Whisper transcription segments.
     """
-    with open(srt_file, 'w', encoding='utf-8') as f:
-        for i, segment in enumerate(segments, 1):
-            start_time = segment['start']
-            end_time = segment['end']
-            # Format time as SRT (HH:MM:SS,mmm)
-            start_srt = f"{int(start_time//3600):02d}:{int((start_time%3600)//60):02d}:{start_time%60:06.3f}".replace('.', ',')
-            end_srt   = f"{int(end_time//3600):02d}:{int((end_time%3600)//60):02d}:{end_time%60:06.3f}".replace('.', ',')
-            f.write(f"{i}\n{start_srt} --> {end_srt}\n{segment['text'].strip()}\n\n")
+    _write_atomic(srt_file, ''.join(_srt_block(i, seg) for i, seg in enumerate(segments, 1)))
 
 def transcriptions_to_txt(segments, txt_file):
     """
     Generate plain text file from Whisper transcription segments, without timestamps.
     """
-    with open(txt_file, 'w', encoding='utf-8') as f:
-        for segment in segments:
-            f.write(f"{segment['text'].strip()}\n")
+    _write_atomic(txt_file, ''.join(_txt_line(segment) for segment in segments))
 
 def transcriptions_to_lrc(segments, lrc_file, title=""):
     """
     Generate LRC (lyrics) file from Whisper transcription segments.
-    
+
     Args:
         segments (list): List of Whisper transcription segments.
         lrc_file (str): Path to output LRC file.
         title (str): Optional title for the LRC metadata.
     """
-    with open(lrc_file, 'w', encoding='utf-8') as f:
-        # Write LRC metadata headers
-        f.write(f"[ti:{title}]\n")
-        f.write("[ar:]\n")
-        f.write("[al:]\n")
-        f.write("[by:Whisper STT]\n")
-        f.write("[offset:0]\n")
-        f.write("\n")
-        
-        # Write lyrics with timestamps
-        for segment in segments:
-            start_time = segment['start']
-            # Convert to total minutes and seconds
-            total_minutes = int(start_time // 60)
-            total_seconds = int(start_time % 60)
-            # Get centiseconds (hundredths of a second)
-            centiseconds = int((start_time % 1) * 100)
-            
-            # Format as LRC: [MM:SS.xx]text
-            lrc_timestamp = f"[{total_minutes:02d}:{total_seconds:02d}.{centiseconds:02d}]"
-            f.write(f"{lrc_timestamp}{segment['text'].strip()}\n")
+    _write_atomic(lrc_file, _lrc_header(title) + ''.join(_lrc_line(segment) for segment in segments))
+
+# Supported audio/video extensions, matched case-insensitively
+_MEDIA_EXTS = frozenset({'.wav', '.m4a', '.mp3', '.aac', '.mp4', '.mov', '.avi', '.mkv', '.flv', '.webm', '.m4v', '.3gp'})
 
 def find_audio_files(directory, recursive=False):
     """
     Find all supported audio/video files in a directory.
-    
+
     Args:
         directory (str): Path to directory to search.
         recursive (bool): If True, search subdirectories recursively.
-    
+
     Returns:
         list: List of audio/video file paths.
     """
-    supported_extensions = {'.wav', '.m4a', '.mp3', '.aac', '.mp4', '.mov', '.avi', '.mkv', '.flv', '.webm', '.m4v', '.3gp'}
-    audio_files = []
-    
-    directory_path = Path(directory)
-    
-    if recursive:
-        # Recursively find all audio files (case-insensitive)
-        for ext in supported_extensions:
-            audio_files.extend(directory_path.rglob(f"*{ext}"))
-            audio_files.extend(directory_path.rglob(f"*{ext.upper()}"))
-    else:
-        # Only search immediate directory (case-insensitive)
-        for ext in supported_extensions:
-            audio_files.extend(directory_path.glob(f"*{ext}"))
-            audio_files.extend(directory_path.glob(f"*{ext.upper()}"))
-    
-    # Remove duplicates (in case file system is case-insensitive) and sort
-    audio_files = list(set(audio_files))
-    return sorted([str(f) for f in audio_files])
+    # One os.scandir walk matching suffixes against the frozenset: the
+    # old per-extension glob traversed the tree 24 times (12 extensions
+    # x 2 cases) and then had to dedupe. Lowercasing the suffix keeps
+    # the case-insensitive match without a second pass.
+    def _walk(path):
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        yield from _walk(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    if os.path.splitext(entry.name)[1].lower() in _MEDIA_EXTS:
+                        yield entry.path
+    return sorted(_walk(directory))
 
 def get_srt_output_path(media_file, output_dir=None):
     """
@@ -208,22 +236,26 @@ def resolve_files_to_process(audio_files, with_srt, without_srt, model_name, ski
     skipped = len(audio_files) - len(files_to_process)
     return files_to_process, skipped
 
-def convert_to_wav(input_file, wav_path):
-    """
-    Extract audio from video/audio file and convert to WAV using ffmpeg.
-    Supports any video/audio format that ffmpeg can handle.
+def load_model(model_name, compute_type="int8"):
+    """Build a faster-whisper model (all CPU threads, cached weights)."""
+    from faster_whisper import WhisperModel
+    return WhisperModel(model_name, device="auto", compute_type=compute_type,
+                        cpu_threads=os.cpu_count() or 4,
+                        download_root=WHISPER_CACHE)
+
+def decode_audio(media_file):
+    """Decode audio to mono 16 kHz float32 samples via an ffmpeg pipe.
+
+    Streams raw PCM straight into memory instead of writing a temp WAV
+    to disk and reading it back; faster-whisper accepts the resulting
+    numpy array directly. Supports any format ffmpeg can handle.
     """
-    cmd = [
-        'ffmpeg',
-        '-y',              # overwrite output
-        '-i', input_file,
-        '-ac', '1',        # mono
-        '-ar', '16000',    # 16 kHz sample rate
-        wav_path
-    ]
-    subprocess.run(cmd, check=True)
-
-def wav_to_subtitles(media_file, output_dir=None, generate_srt=True, generate_txt=False, generate_lrc=False, model_name="base", language=None):
+    import numpy as np
+    cmd = ['ffmpeg','-nostdin','-v','error','-i', media_file,'-f','f32le','-ac','1','-ar','16000','pipe:1']
+    proc = subprocess.run(cmd, capture_output=True, check=True)
+    return np.frombuffer(proc.stdout, dtype=np.float32)
+
+def wav_to_subtitles(media_file, output_dir=None, generate_srt=True, generate_txt=False, generate_lrc=False, model_name="base", language=None, model=None, audio=None, compute_type="int8", batch_size=8):
     """
     Convert media file to SRT, TXT, and LRC using Whisper.
 
@@ -235,6 +267,10 @@ def wav_to_subtitles(media_file, output_dir=None, generate_srt=True, generate_tx
         generate_lrc (bool): If True, generate LRC lyrics file (default: False).
         model_name (str): Whisper model to use (default: "base").
         language (str, optional): Language code (e.g., 'en', 'zh', 'es'). If None, auto-detect.
+        model (WhisperModel, optional): Pre-loaded model to reuse. If None, load one here.
+        audio (np.ndarray, optional): Pre-decoded mono 16 kHz float32 samples. If None, decode here.
+        compute_type (str): CTranslate2 quantization/precision (default: "int8").
+        batch_size (int): Encoder windows batched per forward pass (default: 8).
     """
     # Start timing
     start_time = time.time()
@@ -246,7 +282,6 @@ def wav_to_subtitles(media_file, output_dir=None, generate_srt=True, generate_tx
     ext = Path(media_file).suffix.lower()
     valid_audio = {'.wav', '.m4a', '.mp3', '.aac'}
     valid_video = {'.mp4', '.mov', '.avi', '.mkv', '.flv', '.webm', '.m4v', '.3gp'}
-    temp_wav = None
     output_dir_arg = output_dir
 
     # Determine output directory
@@ -256,13 +291,15 @@ def wav_to_subtitles(media_file, output_dir=None, generate_srt=True, generate_tx
         output_dir = Path(output_dir)
         os.makedirs(output_dir, exist_ok=True)
 
-    if ext in valid_video:
-        # Extract audio from video file and convert to WAV
-        base = Path(media_file).stem
-        temp_wav = os.path.join(output_dir, f"{base}_temp.wav")
-        print(f"Extracting audio from {media_file} and converting to WAV...")
-        convert_to_wav(media_file, temp_wav)
-        audio_path = temp_wav
+    if audio is not None:
+        # Batch mode decodes ahead on a background thread and hands the
+        # PCM in directly
+        audio_path = audio
+    elif ext in valid_video:
+        # Decode the video's audio track straight into memory; no temp
+        # WAV on disk and no second read-back
+        print(f"Extracting audio from {media_file}...")
+        audio_path = decode_audio(media_file)
     elif ext in valid_audio:
         audio_path = media_file
     else:
@@ -275,44 +312,70 @@ def wav_to_subtitles(media_file, output_dir=None, generate_srt=True, generate_tx
     txt_file = str(output_dir / f"{base_name}.txt")
     lrc_file = str(output_dir / f"{base_name}.lrc")
 
-    # Load Whisper
-    print(f"Loading Whisper model ({model_name})...")
-    import ssl
-    import urllib.request
-    ssl._create_default_https_context = ssl._create_unverified_context
-    model = whisper.load_model(model_name)
-
-    # Transcribe
-    print(f"Transcribing {audio_path}...")
-    transcribe_options = {'verbose': False}
+    # Load Whisper (CTranslate2 backend) unless the caller passed in a
+    # warm model — batch mode loads once for the whole run. int8
+    # quantization roughly quadruples CPU throughput and halves memory
+    # at equivalent WER compared with the reference fp32 implementation.
+    if model is None:
+        print(f"Loading Whisper model ({model_name}, {compute_type})...")
+        model = load_model(model_name, compute_type)
+
+    # Transcribe through the batched pipeline: the encoder treats each
+    # 30-second window independently, so feeding several windows per
+    # forward pass amortizes kernel and weight-fetch overhead even for
+    # a single file. The pipeline is a thin wrapper; the weights live
+    # in the shared model.
+    from faster_whisper import BatchedInferencePipeline
+    pipe = BatchedInferencePipeline(model=model)
+    print(f"Transcribing {media_file}...")
+    transcribe_options = {'vad_filter': True, 'beam_size': 5, 'batch_size': batch_size}
     if language:
         transcribe_options['language'] = language
         print(f"Using language: {language}")
     else:
         print("Language: auto-detect")
-    result = model.transcribe(audio_path, **transcribe_options)
+    seg_iter, info = pipe.transcribe(audio_path, **transcribe_options)
 
-    # Write outputs based on flags
+    # faster-whisper yields segments lazily, so stream each one to the
+    # open .part outputs as it is produced: no full segment list in
+    # memory, and progress persists to disk while long files transcribe.
+    # The atomic rename at the end still only publishes complete files.
     outputs_generated = []
-    
+    sinks = []  # (handle, part_path, final_path)
+    f_srt = f_txt = f_lrc = None
     if generate_srt:
         print(f"Writing subtitles to {srt_file}...")
-        transcriptions_to_srt(result['segments'], srt_file)
+        f_srt = open(f"{srt_file}.part", 'w', encoding='utf-8')
+        sinks.append((f_srt, f"{srt_file}.part", srt_file))
         outputs_generated.append(f"SRT: {srt_file}")
-    
     if generate_txt:
         print(f"Writing text to {txt_file}...")
-        transcriptions_to_txt(result['segments'], txt_file)
+        f_txt = open(f"{txt_file}.part", 'w', encoding='utf-8')
+        sinks.append((f_txt, f"{txt_file}.part", txt_file))
         outputs_generated.append(f"TXT: {txt_file}")
-    
     if generate_lrc:
         print(f"Writing lyrics to {lrc_file}...")
-        transcriptions_to_lrc(result['segments'], lrc_file, title=base_name)
+        f_lrc = open(f"{lrc_file}.part", 'w', encoding='utf-8')
+        f_lrc.write(_lrc_header(base_name))
+        sinks.append((f_lrc, f"{lrc_file}.part", lrc_file))
         outputs_generated.append(f"LRC: {lrc_file}")
 
-    # Clean up temp
-    if temp_wav and os.path.exists(temp_wav):
-        os.remove(temp_wav)
+    try:
+        for i, s in enumerate(seg_iter, 1):
+            segment = {'start': s.start, 'end': s.end, 'text': s.text}
+            if f_srt: f_srt.write(_srt_block(i, segment))
+            if f_txt: f_txt.write(_txt_line(segment))
+            if f_lrc: f_lrc.write(_lrc_line(segment))
+    except BaseException:
+        # Don't leave half-written .part files behind on failure
+        for handle, part, _ in sinks:
+            handle.close()
+            if os.path.exists(part):
+                os.remove(part)
+        raise
+    for handle, part, final in sinks:
+        handle.close()
+        os.replace(part, final)
 
     # Calculate and print elapsed time
     elapsed_time = time.time() - start_time
@@ -361,6 +424,20 @@ def main():
         action='store_true',
         help='Use large-v3 model instead of base model'
     )
+    parser.add_argument(
+        '--compute-type',
+        choices=['int8', 'int8_float16', 'float16', 'bfloat16', 'float32'],
+        default='int8',
+        help='Model quantization/precision: int8 gives the best CPU throughput, '
+             'int8_float16 the best GPU memory-vs-speed tradeoff (default: int8)'
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=8,
+        help='Encoder windows batched per forward pass; raise on GPUs with '
+             'memory to spare, lower to 1 on constrained CPUs (default: 8)'
+    )
     parser.add_argument(
         '-r', '--recursive',
         action='store_true',
@@ -410,7 +487,9 @@ def main():
             generate_txt=generate_txt,
             generate_lrc=generate_lrc,
             model_name=model_name,
-            language=args.lang
+            language=args.lang,
+            compute_type=args.compute_type,
+            batch_size=args.batch_size
         )
     elif input_path.is_dir():
         # Directory processing
@@ -442,28 +521,72 @@ def main():
         if not files_to_process:
             sys.exit(0)
 
-        # Process each file
+        # Process each file, sharing one model across the whole batch —
+        # reloading weights per file dominates wall time on short clips
         print(f"\nStarting batch processing ({len(files_to_process)} file(s))...\n")
+        print(f"Loading Whisper model ({model_name}, {args.compute_type}) once for the batch...")
+        model = load_model(model_name, args.compute_type)
+
+        # One throwaway pass over a second of silence triggers kernel
+        # selection and library handle init up front, so the first real
+        # file doesn't pay the cold path. Only worth it when the batch
+        # is big enough to amortize the extra second or two.
+        if len(files_to_process) > 3:
+            import numpy as np
+            warm_start = time.time()
+            try:
+                warm_iter, _ = model.transcribe(np.zeros(16000, dtype=np.float32),
+                                                language=args.lang or "en")
+                for _ in warm_iter:
+                    pass
+                print(f"Model warmed up in {time.time() - warm_start:.2f}s")
+            except Exception:
+                pass  # warm-up is best-effort; real files report their own errors
+
         successful = 0
         failed = 0
 
-        for i, audio_file in enumerate(files_to_process, 1):
-            print(f"[{i}/{len(files_to_process)}] Processing: {audio_file}")
-            try:
-                wav_to_subtitles(
-                    audio_file,
-                    output_dir=args.output,
-                    generate_srt=generate_srt,
-                    generate_txt=generate_txt,
-                    generate_lrc=generate_lrc,
-                    model_name=model_name,
-                    language=args.lang
-                )
-                successful += 1
-            except Exception as e:
-                print(f"ERROR processing {audio_file}: {e}")
-                failed += 1
-            print()  # Empty line for readability
+        # Decode the next file on a background thread while the model is
+        # busy with the current one, so ffmpeg time hides behind the
+        # transcription instead of adding to it
+        with ThreadPoolExecutor(max_workers=1) as decoder:
+            future = decoder.submit(decode_audio, files_to_process[0])
+            for i, audio_file in enumerate(files_to_process, 1):
+                print(f"[{i}/{len(files_to_process)}] Processing: {audio_file}")
+                try:
+                    audio = future.result()
+                except Exception as e:
+                    audio = None
+                    decode_err = e
+                else:
+                    decode_err = None
+                # Kick off the next decode before transcribing, even if
+                # this file failed to decode
+                if i < len(files_to_process):
+                    future = decoder.submit(decode_audio, files_to_process[i])
+                if decode_err is not None:
+                    print(f"ERROR processing {audio_file}: {decode_err}")
+                    failed += 1
+                    print()
+                    continue
+                try:
+                    wav_to_subtitles(
+                        audio_file,
+                        output_dir=args.output,
+                        generate_srt=generate_srt,
+                        generate_txt=generate_txt,
+                        generate_lrc=generate_lrc,
+                        model_name=model_name,
+                        language=args.lang,
+                        model=model,
+                        audio=audio,
+                        batch_size=args.batch_size
+                    )
+                    successful += 1
+                except Exception as e:
+                    print(f"ERROR processing {audio_file}: {e}")
+                    failed += 1
+                print()  # Empty line for readability
 
         # Summary
         print("Batch processing complete!")